@@ -1,18 +1,24 @@
 import streamlit as st
-import base64
+
+from bettersave import assets, media, startup
 
 # Set page config
 st.set_page_config(page_title="BetterSave", layout="wide")
 
+# ✅ Warm the Caches in the Background (once per server process; already running
+# when the server was started with `python -m bettersave.startup run`)
+startup.warm_up()
+
 # ✅ Function to Set Full-Page Background Image with Dark Overlay
-def add_bg_from_local(image_file):
-    with open(image_file, "rb") as image:
-        encoded_image = base64.b64encode(image.read()).decode()
+# The image is referenced by URL: prebuilt, content-hashed WebP/JPEG variants
+# served from app/static/build/ and cached by the browser (bettersave/assets.py).
+def add_bg_image(image_name):
     st.markdown(
         f"""
         <style>
+        {assets.background_css(image_name, ".stApp")}
+
         .stApp {{
-            background-image: url("data:image/jpg;base64,{encoded_image}");
             background-size: cover;
             background-position: center;
             background-repeat: no-repeat;
@@ -131,7 +137,7 @@ def add_bg_from_local(image_file):
     )
 
 # **✅ Apply Background Image**
-add_bg_from_local("static/BK1.jpg")  # Path to the background image in static folder
+add_bg_image("BK1.jpg")  # Background image in the static folder
 
 # **State Variables for Video Playback**
 if "play_video" not in st.session_state:
@@ -142,8 +148,22 @@ if st.button("EXPLORE MORE", key="explore"):
     st.session_state.play_video = True  # Set session state to trigger video
 
 # ✅ **Render Video & Close Button**
+# Bitrate variants from the media server when BETTERSAVE_MEDIA_URL is set
+# (range requests, paced streams, bettersave/media.py); otherwise through
+# st.video(). Nothing is loaded until the button is pressed.
 if st.session_state.play_video:
-    st.video("static/Final_video.MP4")  # Path to the video file inside static folder
+    video_variants = media.variants()
+    if video_variants:
+        variant = st.radio("Video quality", video_variants, index=media.default_index(video_variants),
+                           format_func=media.label, horizontal=True, key="video_quality")
+        if media.MEDIA_URL:
+            st.markdown(media.video_html(variant), unsafe_allow_html=True)
+        else:
+            st.video(str(media.MEDIA_DIR / variant["file"]))
+    elif media.VIDEO.exists():
+        st.video(str(media.VIDEO))  # Not transcoded yet: the original file
+    else:
+        st.info("The video is not available right now.")
 
     # Close Video Button
     if st.button("CLOSE VIDEO", key="close"):
@@ -0,0 +1,46 @@
+# Full rolling-origin backtest of the local forecaster: a cut-off on every
+# day from the second year on, each forecasting 365 days, in-process and on
+# a process pool over shared memory.
+#
+#     python -m benchmarks.backtest [--workers N] [--step DAYS] [--horizon DAYS]
+import argparse
+import os
+import time
+
+import numpy as np
+
+from bettersave import backtest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest benchmark")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--step", type=int, default=1, help="days between cut-offs")
+    parser.add_argument("--horizon", type=int, default=365)
+    parser.add_argument("--forecaster", choices=sorted(backtest.FORECASTERS), default="local")
+    args = parser.parse_args()
+
+    dates, values = backtest.history()
+    origins = backtest.origins_for(len(values), step=args.step)
+    print(f"{len(origins):,} cut-offs × {args.horizon} days, {args.forecaster} forecaster")
+
+    runs = {}
+    for workers in sorted({1, args.workers}):
+        start = time.perf_counter()
+        runs[workers] = backtest.forecasts(dates, values, origins, args.horizon, args.forecaster, workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>3} process(es): {elapsed:8.2f} s  ({elapsed / len(origins) * 1000:.2f} ms per cut-off)")
+
+    if len(runs) > 1:
+        same = all(np.allclose(a, b, equal_nan=True) for a, b in zip(runs[1], runs[args.workers]))
+        print(f"pool results identical to in-process: {same}")
+
+    by_horizon, _ = backtest.metrics(dates, values, origins, *runs[args.workers])
+    for horizon in (1, 7, 30, 90, 365):
+        if horizon <= len(by_horizon):
+            row = by_horizon.iloc[horizon - 1]
+            print(f"  {horizon:>3} days ahead: MAE {row['mae']:>9,.0f} MWh  MAPE {row['mape']:6.1%}  coverage {row['coverage']:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# Time to first meaningful paint of each page in a freshly started server
+# process, with and without the start-up warm-up (bettersave/startup.py).
+#
+#     python -m benchmarks.cold_start [--repeat N] [--modes ...] [--pages ...]
+#
+# Every measurement runs in a new interpreter that has imported Streamlit
+# and nothing else, like a server process before its first session, with
+# an empty disk cache. First meaningful paint is when the page's script
+# run has finished with its content on screen; on the Prediction page that
+# is the forecast chart after pressing Predict (the forecasting API is the
+# local stub server, answering after --latency seconds). Modes:
+#
+#   cold     no warm-up: the first visitor after a deploy does all the work
+#   racing   the warm-up starts at boot and the visitor arrives at once
+#   warmed   the visitor arrives after the warm-up has finished
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+MODES = ("cold", "racing", "warmed")
+POLL_S = 0.05
+DEADLINE_S = 60
+
+
+def forecast_shown(at):
+    return len(at.get("plotly_chart")) > 0
+
+
+# Page -> (action after the first run, predicate for its content being shown)
+PAGES = {
+    "app.py": (None, None),
+    "pages/Dashboard.py": (None, None),
+    "pages/Prediction.py": (lambda at: at.button[0].click(), forecast_shown),
+    "pages/Backtest.py": (None, None),
+    "pages/Storage Simulator.py": (None, None),
+    "pages/ABOUT US.py": (None, None),
+}
+
+
+def child(page, mode):
+    # One measurement, in this (fresh) process; prints it as JSON.
+    sys.path.insert(0, str(ROOT))
+    from streamlit.testing.v1 import AppTest
+
+    warm_up_s = None
+    if mode != "cold":
+        from bettersave import startup
+
+        start = time.perf_counter()
+        thread = startup.warm_up()
+        if mode == "warmed":
+            thread.join()
+            warm_up_s = time.perf_counter() - start
+
+    action, painted = PAGES[page]
+    start = time.perf_counter()
+    at = AppTest.from_file(str(ROOT / page), default_timeout=DEADLINE_S).run()
+    if action is not None:
+        action(at)
+        at.run()
+    while painted is not None and not painted(at) and not at.exception:
+        if time.perf_counter() - start > DEADLINE_S:
+            raise SystemExit(f"{page}: nothing shown after {DEADLINE_S} s")
+        time.sleep(POLL_S)
+        at.run()
+    first_paint_ms = (time.perf_counter() - start) * 1000
+    errors = [str(exception.value) for exception in at.exception]
+    print(json.dumps({"first_paint_ms": first_paint_ms, "warm_up_s": warm_up_s, "errors": errors}))
+
+
+def measure(page, mode, api_url):
+    env = {
+        **os.environ,
+        "BETTERSAVE_API_URL": api_url,
+        "BETTERSAVE_CACHE_DIR": tempfile.mkdtemp(prefix="cold_start-"),
+        "BETTERSAVE_WARM_UP": "0" if mode == "cold" else "1",
+    }
+    out = subprocess.run([sys.executable, "-m", "benchmarks.cold_start", "--child", page, mode], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first meaningful paint of a fresh server process")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per page and mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--pages", nargs="+", choices=sorted(PAGES), default=list(PAGES))
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds the stub forecasting API takes")
+    parser.add_argument("--child", nargs=2, metavar=("PAGE", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    sys.path.insert(0, str(ROOT))
+    from bettersave.stub_server import StubServer
+    server = StubServer(latency=args.latency).start()
+
+    print(f"first meaningful paint, median of {args.repeat} fresh processes (ms)")
+    print(f"{'page':<28}" + "".join(f"{mode:>10}" for mode in args.modes))
+    warm_ups = []
+    errors = []
+    for page in args.pages:
+        row = []
+        for mode in args.modes:
+            runs = [measure(page, mode, server.url) for _ in range(args.repeat)]
+            row.append(np.median([run["first_paint_ms"] for run in runs]))
+            warm_ups += [run["warm_up_s"] for run in runs if run["warm_up_s"] is not None]
+            errors += [f"{page} ({mode}): {error}" for run in runs for error in run["errors"]]
+        print(f"{page:<28}" + "".join(f"{ms:10.0f}" for ms in row))
+    server.shutdown()
+
+    if warm_ups:
+        print(f"warm-up in the background: {np.median(warm_ups):.2f} s after boot (median)")
+    if errors:
+        print("\nerrors:")
+        for error in sorted(set(errors)):
+            print(f"  {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Several replicas sharing one cache directory: how many forecasting API
+# calls and rollup builds the fleet makes, and how fast a fresh replica
+# starts once the cache is warm.
+#
+#     python -m benchmarks.disk_cache [--replicas N] [--requests N] [--latency S]
+#
+# Replicas are separate processes, each with its own PredictionClient, all
+# pointed at one stub server (bettersave/stub_server.py) and one temporary
+# cache directory.
+import argparse
+import tempfile
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from bettersave import datasets, rollup, storage
+from bettersave.disk_cache import DiskCache
+from bettersave.prediction_client import PredictionClient
+from bettersave.stub_server import StubServer
+
+POPULAR = [7, 14, 30, 60, 90, 180, 365]
+
+
+def build_rollup(version):
+    frames = {name: datasets.frame(name, version) for name in storage.DATASETS}
+    return rollup.Rollup.build(frames)
+
+
+def replica(args):
+    cache_dir, url, horizons = args
+    cache = DiskCache(cache_dir)
+    client = PredictionClient(url)
+    version = storage.dataset_version()
+
+    start = time.perf_counter()
+    cache.get_or_compute("rollup", version, lambda: build_rollup(version))
+    startup = time.perf_counter() - start
+    for steps in horizons:
+        cache.get_or_compute("forecast", (url, int(steps)), lambda: client.predict(int(steps)))
+    client.close()
+    return startup, cache.computes
+
+
+def run_fleet(cache_dir, url, replicas, requests, rng):
+    streams = [(cache_dir, url, rng.choice(POPULAR, size=requests)) for _ in range(replicas)]
+    with Pool(replicas) as pool:
+        return pool.map(replica, streams)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cross-replica disk cache benchmark")
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50, help="forecast requests per replica")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub backend latency, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    server = StubServer(latency=args.latency).start()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label in ["cold fleet", "fresh replicas, warm cache"]:
+            calls_before = server.predictions
+            results = run_fleet(cache_dir, server.url, args.replicas, args.requests, rng)
+            startups = [startup for startup, _ in results]
+            computes = sum(count for _, count in results)
+            print(f"{label}:")
+            print(f"  backend calls       {server.predictions - calls_before:5d}  "
+                  f"(distinct horizons {len(POPULAR)}, requests {args.replicas * args.requests})")
+            print(f"  values computed     {computes:5d}")
+            print(f"  rollup at startup   {np.mean(startups) * 1000:8.1f} ms mean, {max(startups) * 1000:8.1f} ms max")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Time batched storage dispatch over the full daily history for growing
+# numbers of store configurations.
+#
+#     python -m benchmarks.dispatch [--sizes 1000 10000 50000]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from bettersave import dispatch
+
+
+def grid_of(size, rng):
+    # Random configurations spanning the ranges offered on the Storage page.
+    return pd.DataFrame({
+        "capacity_mwh": rng.uniform(1e3, 5e5, size),
+        "charge_mw": rng.uniform(1e2, 2e4, size),
+        "discharge_mw": rng.uniform(1e2, 2e4, size),
+        "efficiency": rng.uniform(0.6, 0.95, size),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage dispatch benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    args = parser.parse_args()
+
+    dates, surplus_mwh, deficit_mwh = dispatch.daily_balance()
+    rng = np.random.default_rng(0)
+    print(f"{len(dates)} days ({dates[0]:%Y-%m-%d} .. {dates[-1]:%Y-%m-%d})")
+    for size in args.sizes:
+        configs = grid_of(size, rng)
+        start = time.perf_counter()
+        results, _ = dispatch.simulate(surplus_mwh, deficit_mwh, configs)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8,} configurations: {elapsed:6.2f}s "
+              f"({size * len(dates) / elapsed / 1e6:,.1f}M config-days/s), "
+              f"best deficit covered {results['deficit_covered'].max():.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Replay a synthetic stream of Prediction page requests against the old
+# per-horizon cache (st.cache_data keyed on the exact `steps`) and the
+# horizon-superset ForecastCache, and compare backend calls and latency.
+#
+#     python -m benchmarks.forecast_cache [--requests N] [--seed S]
+#
+# Backend latency is simulated (no network): a fixed round trip plus a
+# per-step cost, so the numbers show the effect of the caching policy only.
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from bettersave.forecast_cache import ForecastCache
+
+ROUND_TRIP_S = 0.8
+PER_STEP_S = 0.004
+# Slider positions people actually pick, plus a long uniform tail.
+POPULAR = [7, 14, 30, 60, 90, 180, 365]
+
+
+def backend_latency(steps):
+    return ROUND_TRIP_S + PER_STEP_S * steps
+
+
+def request_stream(n, rng):
+    popular = rng.choice(POPULAR, size=n)
+    uniform = rng.integers(1, 366, size=n)
+    return np.where(rng.random(n) < 0.7, popular, uniform)
+
+
+def replay_exact(stream):
+    seen = set()
+    latencies = []
+    for steps in stream:
+        if steps in seen:
+            latencies.append(0.0)
+        else:
+            seen.add(steps)
+            latencies.append(backend_latency(steps))
+    return len(seen), np.array(latencies)
+
+
+def replay_superset(stream):
+    latencies = []
+    last = {}
+
+    def fetch(steps):
+        last["latency"] = backend_latency(steps)
+        return pd.DataFrame({"forecast": np.zeros(steps)})
+
+    cache = ForecastCache(fetch)
+    for steps in stream:
+        last["latency"] = 0.0
+        cache.get(int(steps))
+        latencies.append(last["latency"])
+    return cache.backend_calls, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast cache policy comparison")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stream = request_stream(args.requests, np.random.default_rng(args.seed))
+    print(f"{args.requests} requests, {len(set(stream.tolist()))} distinct horizons")
+    print(f"{'policy':<10} {'backend calls':>14} {'p95 s':>8} {'p99 s':>8} {'total s':>9}")
+    for policy, replay in [("exact", replay_exact), ("superset", replay_superset)]:
+        calls, latencies = replay(stream)
+        print(f"{policy:<10} {calls:>14} {np.percentile(latencies, 95):>8.3f} "
+              f"{np.percentile(latencies, 99):>8.3f} {latencies.sum():>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
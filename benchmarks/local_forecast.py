@@ -0,0 +1,51 @@
+# Fit and predict timings of the local residual-load forecaster for the
+# Prediction page's full 1-365 day range, plus its accuracy on the last year
+# of history when trained on the years before it.
+#
+#     python -m benchmarks.local_forecast [--repeat N]
+import argparse
+import time
+
+import numpy as np
+
+from bettersave import storage
+from bettersave.local_forecast import TARGET, LocalForecaster
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local forecaster benchmark")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    energy_cons = storage.load_dataset("energy_consumption")
+    dates, values = energy_cons["Start date"], energy_cons[TARGET].to_numpy()
+
+    fit_s, model = best_of(args.repeat, lambda: LocalForecaster().fit(dates, values))
+    predict_s, _ = best_of(args.repeat, lambda: model.predict(365))
+    all_s, _ = best_of(5, lambda: [model.predict(steps) for steps in range(1, 366)])
+    print(f"fit on {len(values)} days:        {fit_s * 1000:8.3f} ms")
+    print(f"predict 365 steps:          {predict_s * 1000:8.3f} ms")
+    print(f"predict every 1..365 horizon: {all_s * 1000:6.1f} ms total")
+
+    holdout = 365
+    model = LocalForecaster().fit(dates[:-holdout], values[:-holdout])
+    forecast = model.predict(holdout, start=dates.iloc[-holdout])
+    actual = values[-holdout:]
+    error = forecast["forecast"].to_numpy() - actual
+    coverage = np.mean((actual >= forecast["lower"]) & (actual <= forecast["upper"]))
+    print(f"last-year holdout: MAE {np.abs(error).mean():,.0f} MWh, "
+          f"MAPE {np.mean(np.abs(error) / np.abs(actual)) * 100:.1f}%, "
+          f"{model.interval:.0%} interval coverage {coverage:.1%}")
+
+
+if __name__ == "__main__":
+    main()
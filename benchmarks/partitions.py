@@ -0,0 +1,86 @@
+# Reading a quarter-hour dataset whole versus by year partition.
+#
+#     python -m benchmarks.partitions [--years N] [--keep]
+#
+# The quarter-hour series is synthesized from the daily consumption dataset
+# (each day spread over 96 quarter hours with a daily load profile) and
+# repeated to cover --years years, then written both as one Parquet file
+# and as the year/month-partitioned dataset of bettersave/partitions.py.
+# --keep writes the partitioned copy to data/partitioned/ as well, so the
+# Dashboard's "Quarter-hour Load" tab can be tried without a SMARD export.
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from bettersave import datasets, partitions, storage
+
+QUARTERS_PER_DAY = 96
+
+
+def synthetic_quarter_hours(years):
+    daily = datasets.frame("energy_consumption")
+    values = daily.drop(columns=storage.DATE_COLUMNS + storage.DERIVED_COLUMNS).to_numpy()
+    # Night trough, morning and evening peaks; averages to 1.
+    hours = np.arange(QUARTERS_PER_DAY) / 4
+    profile = 1 + 0.25 * np.sin((hours - 9) / 24 * 2 * np.pi) + 0.1 * np.sin((hours - 5) / 12 * 2 * np.pi)
+    profile /= profile.mean()
+    per_quarter = (values[:, None, :] / QUARTERS_PER_DAY * profile[None, :, None]).reshape(-1, values.shape[1])
+
+    cycles = int(np.ceil(years / 5))
+    per_quarter = np.tile(per_quarter, (cycles, 1))
+    start = pd.Timestamp("2015-01-01") - pd.DateOffset(years=5 * (cycles - 1))
+    dates = pd.date_range(start, periods=len(per_quarter), freq="15min")
+    columns = list(daily.columns.drop(storage.DATE_COLUMNS + storage.DERIVED_COLUMNS))
+    df = pd.DataFrame(per_quarter, columns=columns)
+    df.insert(0, "Start date", dates)
+    df.insert(1, "End date", dates + pd.Timedelta(minutes=15))
+    return storage.to_table(df)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="partitioned quarter-hour loading benchmark")
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="also write the dataset to data/partitioned/")
+    args = parser.parse_args()
+
+    table = synthetic_quarter_hours(args.years)
+    columns = ["Start date", "Total (grid load) [MWh] Calculated resolutions"]
+    last_year = table["Start date"][-1].as_py().year
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        single = root / "single.parquet"
+        pq.write_table(table, single)
+        _, write_s = timed(lambda: partitions.write("energy_consumption", "quarterhour", table.to_batches(1 << 16), table.schema, root))
+        print(f"{table.num_rows:,} quarter hours, {table.num_columns} columns, written in {write_s:.2f} s")
+
+        whole, whole_s = timed(lambda: pq.read_table(single))
+        one_year, one_s = timed(lambda: partitions.read("energy_consumption", "quarterhour", last_year, last_year, columns, root))
+        lazy = partitions.LazyPartitions("energy_consumption", "quarterhour", root)
+        _, first_s = timed(lambda: lazy.load(last_year - 1, last_year, columns))
+        _, widen_s = timed(lambda: lazy.load(last_year - 2, last_year, columns))
+        _, again_s = timed(lambda: lazy.load(last_year - 2, last_year, columns))
+
+        print(f"{'whole file, all columns':<34} {whole_s * 1000:8.1f} ms  {whole.nbytes / 2**20:8.1f} MiB")
+        print(f"{'one year, 2 columns':<34} {one_s * 1000:8.1f} ms  {one_year.nbytes / 2**20:8.1f} MiB")
+        print(f"{'lazy: 2 years':<34} {first_s * 1000:8.1f} ms")
+        print(f"{'lazy: widened to 3 years':<34} {widen_s * 1000:8.1f} ms  (reads only the new year)")
+        print(f"{'lazy: same 3 years again':<34} {again_s * 1000:8.1f} ms")
+
+    if args.keep:
+        partitions.write("energy_consumption", "quarterhour", table.to_batches(1 << 16), table.schema)
+        print(f"written to {partitions.partition_path('energy_consumption', 'quarterhour').relative_to(storage.ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
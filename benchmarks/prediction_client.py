@@ -0,0 +1,64 @@
+# Exercise PredictionClient against the local stub server (no network):
+# per-call latency with and without the pooled session, request coalescing
+# under concurrent identical requests, and the timeout bound on a hung
+# backend.
+#
+#     python -m benchmarks.prediction_client [--calls N] [--concurrency N]
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from bettersave.prediction_client import PredictionClient
+from bettersave.stub_server import StubServer
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):6.2f} ms  p95 {np.percentile(ms, 95):6.2f} ms"
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediction client benchmark")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    server = StubServer().start()
+    client = PredictionClient(server.url)
+
+    unpooled = [timed(lambda: requests.get(server.url, params={"steps": 30}).json()) for _ in range(args.calls)]
+    pooled = [timed(client.get_json, 30) for _ in range(args.calls)]
+    print(f"sequential, new connection per call: {percentiles(unpooled)}")
+    print(f"sequential, pooled keep-alive:       {percentiles(pooled)}")
+
+    server.latency = 0.3
+    before = server.predictions
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        start = time.perf_counter()
+        frames = list(pool.map(lambda _: client.predict(90), range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    print(f"{args.concurrency} concurrent identical requests: {server.predictions - before} upstream call(s), "
+          f"{elapsed:.2f}s, {len(frames)} frames of {len(frames[0])} rows")
+
+    server.latency = 5.0
+    hung = PredictionClient(server.url, timeout=(1, 0.5), retries=1, backoff=0.1)
+    start = time.perf_counter()
+    try:
+        hung.predict(30)
+    except requests.RequestException as exc:
+        print(f"hung backend: gave up after {time.perf_counter() - start:.2f}s ({type(exc).__name__})")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Date-range totals from a boolean mask + sum over the frame (what a
+# filtered .sum() does) versus two lookups in a PrefixIndex, on the daily
+# datasets and on a synthetic multi-decade quarter-hour series.
+#
+#     python -m benchmarks.prefix_index [--queries N] [--years N]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from bettersave import datasets
+from bettersave.prefix_index import PrefixIndex
+
+
+def random_ranges(dates, n, rng):
+    picks = np.sort(rng.integers(0, len(dates), size=(n, 2)), axis=1)
+    return [(dates[a], dates[b]) for a, b in picks]
+
+
+def compare(label, df, columns, queries, rng):
+    dates = df["Start date"].to_numpy()
+    ranges = random_ranges(dates, queries, rng)
+
+    start = time.perf_counter()
+    index = PrefixIndex.from_frame(df, columns=columns)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for first, last in ranges:
+        mask = (df["Start date"] >= first) & (df["Start date"] <= last)
+        df.loc[mask, columns].sum()
+    scan = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for first, last in ranges:
+        index.total(first, last)
+    lookup = (time.perf_counter() - start) / queries
+
+    print(f"{label:<28} {len(df):>10,} rows  build {build * 1000:8.1f} ms  "
+          f"scan {scan * 1e6:10.1f} us/query  index {lookup * 1e6:7.1f} us/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="prefix-sum index benchmark")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--years", type=int, default=30, help="length of the synthetic quarter-hour series")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    gen = datasets.frame("energy_generation")
+    sources = [c for c in gen.columns if c.endswith("Calculated resolutions")]
+    compare("daily generation", gen, sources, args.queries, rng)
+
+    dates = pd.date_range("1990-01-01", periods=args.years * 365 * 96, freq="15min")
+    synthetic = pd.DataFrame(rng.random((len(dates), len(sources))), columns=sources)
+    synthetic.insert(0, "Start date", dates)
+    compare(f"quarter-hour, {args.years} years", synthetic, sources, args.queries // 10, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# Rerun latency of every Streamlit page, driven headlessly with AppTest.
+#
+#     python -m benchmarks.rerun_latency [--repeat N] [--budget FILE] [--pages ...]
+#
+# For each page: one cold run (all st.cache_data / st.cache_resource entries
+# cleared, fresh session), N warm reruns, and the page's usual widget
+# interactions. The Prediction page talks to the local stub server
+# (bettersave/stub_server.py), so no network is needed.
+#
+# Results are written to benchmarks/results/rerun_latency-<timestamp>.json
+# and compared with the previous run. The exit status is 1 when a page
+# exceeds its budget in benchmarks/latency_budget.json.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+BUDGET_FILE = ROOT / "benchmarks" / "latency_budget.json"
+
+FORECAST_WAIT_S = 60
+
+
+def after_forecast(interact):
+    # The Prediction page fetches forecasts in the background and shows
+    # them on a later rerun: rerun (untimed) until the chart is up, as a
+    # visitor would wait, then apply the interaction.
+    def apply(at):
+        deadline = time.perf_counter() + FORECAST_WAIT_S
+        while not at.get("plotly_chart") and not at.exception and time.perf_counter() < deadline:
+            time.sleep(0.05)
+            at.run()
+        interact(at)
+    return apply
+
+
+# Page -> [(interaction name, function applying it to an AppTest)]
+PAGES = {
+    "app.py": [
+        ("explore more", lambda at: at.button(key="explore").click()),
+        ("close video", lambda at: at.button(key="close").click()),
+    ],
+    "pages/Dashboard.py": [
+        ("years 2016-2018", lambda at: at.sidebar.slider[0].set_value((2016, 2018))),
+        ("years 2017-2017", lambda at: at.sidebar.slider[0].set_value((2017, 2017))),
+        ("years 2015-2019", lambda at: at.sidebar.slider[0].set_value((2015, 2019))),
+    ],
+    "pages/Prediction.py": [
+        ("predict", lambda at: at.button[0].click()),
+        ("prediction days 90", lambda at: at.slider[0].set_value(90)),
+        ("prediction days 365", lambda at: at.slider[0].set_value(365)),
+        ("surplus months 6", after_forecast(lambda at: at.slider(key="surplus_months").set_value(6))),
+    ],
+    "pages/ABOUT US.py": [],
+    "pages/Backtest.py": [
+        ("horizon 180", lambda at: at.sidebar.slider[0].set_value(180)),
+        ("cut-off every 30", lambda at: at.sidebar.select_slider[0].set_value(30)),
+    ],
+    "pages/Storage Simulator.py": [
+        ("capacity steps 60", lambda at: at.sidebar.slider[1].set_value(60)),
+        ("efficiency 0.75", lambda at: at.select_slider[0].set_value(0.75)),
+    ],
+}
+
+
+def timed_run(at, label, errors):
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        errors.append(f"{label}: {at.exception[0].value}")
+    return elapsed
+
+
+def measure(page, interactions, repeat):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(str(ROOT / page), default_timeout=300)
+    errors = []
+    cold = timed_run(at, "cold", errors)
+    warm = [timed_run(at, "warm", errors) for _ in range(repeat)]
+    steps = {}
+    for name, interact in interactions:
+        try:
+            interact(at)
+        except (KeyError, IndexError) as exc:
+            # The widget is not on the page (e.g. an earlier step failed).
+            errors.append(f"{name}: widget not found ({exc})")
+            continue
+        steps[name] = timed_run(at, name, errors)
+    return {
+        "cold_ms": cold,
+        "warm_ms_p50": float(np.percentile(warm, 50)),
+        "warm_ms_p95": float(np.percentile(warm, 95)),
+        "interaction_ms": steps,
+        "errors": sorted(set(errors)),
+    }
+
+
+def over_budget(page, result, budgets):
+    budget = {**budgets["default"], **budgets.get(page, {})}
+    failures = list(result["errors"])
+    if result["cold_ms"] > budget["cold_ms"]:
+        failures.append(f"cold {result['cold_ms']:.0f} ms > {budget['cold_ms']} ms")
+    if result["warm_ms_p95"] > budget["warm_ms"]:
+        failures.append(f"warm p95 {result['warm_ms_p95']:.0f} ms > {budget['warm_ms']} ms")
+    for name, ms in result["interaction_ms"].items():
+        if ms > budget["interaction_ms"]:
+            failures.append(f"{name} {ms:.0f} ms > {budget['interaction_ms']} ms")
+    return failures
+
+
+def previous_results():
+    runs = sorted(RESULTS_DIR.glob("rerun_latency-*.json"))
+    return json.loads(runs[-1].read_text()) if runs else None
+
+
+def delta(now, before):
+    if before is None:
+        return ""
+    return f" ({(now - before) / before * 100:+.0f}%)" if before else ""
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit page rerun latency benchmark")
+    parser.add_argument("--repeat", type=int, default=10, help="warm reruns per page")
+    parser.add_argument("--budget", type=Path, default=BUDGET_FILE, help="latency budget JSON")
+    parser.add_argument("--pages", nargs="+", choices=sorted(PAGES), default=list(PAGES))
+    parser.add_argument("--no-save", action="store_true", help="do not store this run's results")
+    args = parser.parse_args()
+
+    # Pages import bettersave the way `streamlit run app.py` would find it,
+    # and the Prediction page must talk to the stub before its client exists.
+    sys.path.insert(0, str(ROOT))
+    from bettersave.stub_server import StubServer
+    server = StubServer().start()
+    os.environ["BETTERSAVE_API_URL"] = server.url
+    # Cold runs measure each page on its own, without a warm-up thread
+    # competing for the CPU; benchmarks/cold_start.py measures the warm-up.
+    os.environ["BETTERSAVE_WARM_UP"] = "0"
+
+    budgets = json.loads(args.budget.read_text())
+    before = previous_results()
+    results = {}
+    failures = []
+    for page in args.pages:
+        result = results[page] = measure(page, PAGES[page], args.repeat)
+        prev = (before or {}).get("pages", {}).get(page, {})
+        print(f"{page}")
+        print(f"  {'cold':<20}{result['cold_ms']:8.1f} ms{delta(result['cold_ms'], prev.get('cold_ms'))}")
+        print(f"  {'warm p50':<20}{result['warm_ms_p50']:8.1f} ms{delta(result['warm_ms_p50'], prev.get('warm_ms_p50'))}")
+        print(f"  {'warm p95':<20}{result['warm_ms_p95']:8.1f} ms{delta(result['warm_ms_p95'], prev.get('warm_ms_p95'))}")
+        for name, ms in result["interaction_ms"].items():
+            print(f"  {name:<20}{ms:8.1f} ms{delta(ms, prev.get('interaction_ms', {}).get(name))}")
+        failures += [f"{page}: {failure}" for failure in over_budget(page, result, budgets)]
+    server.shutdown()
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = RESULTS_DIR / f"rerun_latency-{stamp}.json"
+        path.write_text(json.dumps({"timestamp": stamp, "revision": git_revision(), "pages": results}, indent=2))
+        print(f"results written to {path.relative_to(ROOT)}")
+
+    if failures:
+        print("\nfailures:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Resident memory as the number of concurrent sessions grows, for the
+# datasets handed out the old way (st.cache_data: every rerun unpickles its
+# own copy) and through the shared service in bettersave/datasets.py
+# (every rerun gets a read-only view of one copy).
+#
+#     python -m benchmarks.session_memory [--sessions 1 10 50 200]
+#
+# Each session holds both datasets and adds a derived column, as the
+# Dashboard did with energy_consumption["Year"]. Every (mode, sessions)
+# pair runs in a fresh interpreter so the figures do not leak into each
+# other.
+import argparse
+import json
+import pickle
+import subprocess
+import sys
+
+from bettersave import datasets, storage
+from benchmarks.storage import rss_bytes
+
+MODES = ["cache_data", "shared"]
+
+
+def session_frames(mode, cached):
+    if mode == "cache_data":
+        # What st.cache_data returns on a hit: a fresh copy of the value.
+        frames = pickle.loads(cached)
+    else:
+        frames = [datasets.frame(name) for name in storage.DATASETS]
+    for df in frames:
+        df["Year"] = df["Start date"].dt.year
+    return frames
+
+
+def run_child(mode, sessions):
+    import pandas  # noqa: F401
+
+    # The one-off cost every process pays before the first session.
+    shared = datasets.shared()
+    cached = pickle.dumps([shared.frame(name) for name in storage.DATASETS]) if mode == "cache_data" else None
+    before = rss_bytes()
+    held = [session_frames(mode, cached) for _ in range(sessions)]
+    rss_delta = rss_bytes() - before
+    print(json.dumps({
+        "mode": mode,
+        "sessions": len(held),
+        "rss_mib": rss_delta / 2**20,
+        "kib_per_session": rss_delta / len(held) / 1024,
+        "dataset_mib": shared.nbytes / 2**20,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="memory per concurrent session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.sessions[0])
+        return
+
+    print(f"{'mode':<12} {'sessions':>9} {'RSS MiB':>9} {'KiB/session':>12}")
+    for mode in MODES:
+        for sessions in args.sessions:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.session_memory", "--child", mode, "--sessions", str(sessions)],
+                cwd=storage.ROOT, check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode:<12} {sessions:>9} {result['rss_mib']:>9.2f} {result['kib_per_session']:>12.1f}")
+    print(f"(both datasets: {result['dataset_mib']:.2f} MiB, held once per process)")
+
+
+if __name__ == "__main__":
+    main()
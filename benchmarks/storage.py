@@ -0,0 +1,94 @@
+# Compare loading the energy datasets from the preprocessed CSVs with loading
+# them from the columnar files written by bettersave.storage.
+#
+#     python -m benchmarks.storage [--repeat N]
+#
+# Each loader runs in a fresh interpreter so the resident-memory figure is
+# not polluted by the other loaders (or by earlier repeats).
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from bettersave import storage
+
+LOADERS = ["csv", "parquet", "arrow-mmap"]
+
+
+def rss_bytes():
+    # Current resident set size; /proc is Linux-only, fall back to peak RSS.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def load(loader):
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    frames = []
+    for name, csv_path in storage.DATASETS.items():
+        if loader == "csv":
+            df = pd.read_csv(csv_path)
+            df["Start date"] = pd.to_datetime(df["Start date"], errors="coerce")
+        elif loader == "parquet":
+            df = pq.read_table(storage.parquet_path(name)).to_pandas(split_blocks=True)
+        else:
+            df = storage.load_dataset(name)
+        frames.append(df)
+    return frames
+
+
+def run_child(loader, repeat):
+    # Import everything up front so only the load itself is measured.
+    import pandas  # noqa: F401
+    import pyarrow.parquet  # noqa: F401
+
+    before = rss_bytes()
+    timings = []
+    kept = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        kept.append(load(loader))
+        timings.append(time.perf_counter() - start)
+    rss_delta = (rss_bytes() - before) / repeat
+    print(json.dumps({
+        "loader": loader,
+        "first_ms": timings[0] * 1000,
+        "best_ms": min(timings) * 1000,
+        "rss_mib_per_load": rss_delta / 2**20,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV vs columnar load benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--child", choices=LOADERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.repeat)
+        return
+
+    for name in storage.DATASETS:
+        if not storage.arrow_path(name).exists():
+            storage.convert(name)
+
+    print(f"{'loader':<12} {'first ms':>10} {'best ms':>10} {'RSS MiB/load':>14}")
+    for loader in LOADERS:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.storage", "--child", loader, "--repeat", str(args.repeat)],
+            cwd=storage.ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{loader:<12} {result['first_ms']:>10.2f} {result['best_ms']:>10.2f} "
+              f"{result['rss_mib_per_load']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Cost of a tracing span with tracing off (the default for every rerun) and
+# on (BETTERSAVE_TRACE=1 or the Performance panel).
+#
+#     python -m benchmarks.tracing [--spans N]
+#
+# The pages open a dozen or so spans per rerun, so the per-span cost times
+# ~20 is the overhead added to a rerun.
+import argparse
+import time
+
+from bettersave import tracing
+
+
+def per_span_us(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("bench"):
+            pass
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tracing span overhead")
+    parser.add_argument("--spans", type=int, default=200_000)
+    args = parser.parse_args()
+
+    baseline_start = time.perf_counter()
+    for _ in range(args.spans):
+        pass
+    baseline = (time.perf_counter() - baseline_start) / args.spans * 1e6
+
+    tracing.begin("bench", enabled=False)
+    off = per_span_us(args.spans)
+    trace = tracing.begin("bench", enabled=True)
+    on = per_span_us(args.spans // 10)
+    tracing.begin("bench", enabled=False)
+    print(f"{'empty loop':<20}{baseline:8.3f} us")
+    print(f"{'span, tracing off':<20}{off - baseline:8.3f} us  ({(off - baseline) * 20:.1f} us per 20-span rerun)")
+    print(f"{'span, tracing on':<20}{on - baseline:8.3f} us  ({(on - baseline) * 20:.1f} us per 20-span rerun, {len(trace.spans):,} spans kept)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# Prebuilt image variants, served by Streamlit's static file server.
+#
+# app.py used to read static/BK1.jpg on every rerun and inline it into the
+# page's CSS as a base64 data URI: half a megabyte (a third more once
+# encoded) sent over the websocket on every click, and never cached by the
+# browser. Instead, each image in static/ is resized to a few widths and
+# recompressed as WebP and as progressive JPEG (without its EXIF/XMP
+# metadata), into static/build/ under content-hashed names:
+#
+#     static/build/BK1-1280.3f9c2a1b.webp
+#
+# With server.enableStaticServing (see .streamlit/config.toml) they are
+# served at app/static/build/..., and url() adds the hash as ?v=, which
+# makes Tornado's static handler send a ten-year Cache-Control. A changed
+# image gets a new name, so a cached copy is never stale. background_css()
+# picks the variant by viewport width and WebP support.
+#
+# The variants and static/build/manifest.json are committed; rebuild them
+# after changing an image with:
+#
+#     python -m bettersave.assets
+#
+# If the manifest is missing or older than an image, the variants are built
+# on first use instead.
+import argparse
+import hashlib
+import io
+import json
+import threading
+from pathlib import Path
+
+# Not storage.ROOT, and Pillow is imported by build_image() only: the
+# landing page reads the manifest and needs neither pandas, pyarrow nor
+# Pillow (see bettersave/startup.py).
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+BUILD_DIR = STATIC_DIR / "build"
+MANIFEST = BUILD_DIR / "manifest.json"
+URL_PREFIX = "app/static"
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+# Widest first; sources narrower than a width are not upscaled.
+WIDTHS = (1920, 1280, 640)
+# format -> (Pillow format, extension, MIME type, save options). The images
+# are page backgrounds under a dark overlay, where these qualities do not
+# show.
+FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 70, "method": 6}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 75, "optimize": True, "progressive": True}),
+}
+
+_lock = threading.Lock()
+_manifest = None
+
+
+def file_hash(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def encode(image, fmt):
+    pil_format, _, _, options = FORMATS[fmt]
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def build_image(source, build_dir=BUILD_DIR):
+    # Writes every variant of one image; returns its manifest entry.
+    from PIL import Image
+
+    with Image.open(source) as original:
+        image = original.convert("RGB")
+    variants = []
+    for width in sorted({min(width, image.width) for width in WIDTHS}, reverse=True):
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt, (_, extension, mime, _) in FORMATS.items():
+            data = encode(resized, fmt)
+            digest = hashlib.sha1(data).hexdigest()[:8]
+            name = f"{source.stem}-{width}.{digest}.{extension}"
+            path = build_dir / name
+            if not path.exists():
+                path.write_bytes(data)
+            variants.append({"width": width, "format": fmt, "type": mime, "file": name, "hash": digest, "bytes": len(data)})
+    return {
+        "source": file_hash(source),
+        "bytes": source.stat().st_size,
+        "width": image.width,
+        "height": image.height,
+        "variants": variants,
+    }
+
+
+def sources(static_dir=STATIC_DIR):
+    return sorted(path for path in static_dir.iterdir() if path.suffix.lower() in IMAGE_SUFFIXES)
+
+
+def build(static_dir=STATIC_DIR, build_dir=BUILD_DIR):
+    # Rebuilds the variants of every image in static/, removes the ones no
+    # longer referenced and writes the manifest.
+    build_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {source.name: build_image(source, build_dir) for source in sources(static_dir)}
+    keep = {variant["file"] for entry in manifest.values() for variant in entry["variants"]}
+    for path in build_dir.iterdir():
+        if path.name != MANIFEST.name and path.name not in keep:
+            path.unlink()
+    tmp = build_dir / (MANIFEST.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n")
+    tmp.replace(build_dir / MANIFEST.name)
+    return manifest
+
+
+def manifest():
+    # The manifest, rebuilt first if an image has changed since it was
+    # written. Read once per process.
+    global _manifest
+    with _lock:
+        if _manifest is None:
+            try:
+                loaded = json.loads(MANIFEST.read_text())
+            except FileNotFoundError:
+                loaded = {}
+            current = {source.name: file_hash(source) for source in sources()}
+            if {name: entry["source"] for name, entry in loaded.items()} != current:
+                loaded = build()
+            _manifest = loaded
+        return _manifest
+
+
+def variants_of(entry, fmt):
+    # The variants of a manifest entry in `fmt`, widest first.
+    return [variant for variant in entry["variants"] if variant["format"] == fmt]
+
+
+def variants(name, fmt):
+    return variants_of(manifest()[name], fmt)
+
+
+def url(variant):
+    return f"{URL_PREFIX}/build/{variant['file']}?v={variant['hash']}"
+
+
+def background_css(name, selector):
+    # background-image rules for `selector`: the narrowest variant at least
+    # as wide as the viewport, as WebP where the browser takes image-set()
+    # with types, and as JPEG otherwise.
+    webp, jpeg = variants(name, "webp"), variants(name, "jpeg")
+    rules = []
+    for i, (w, j) in enumerate(zip(webp, jpeg)):
+        declarations = (
+            f'{selector} {{ background-image: url("{url(j)}"); '
+            f'background-image: image-set(url("{url(w)}") type("{w["type"]}"), url("{url(j)}") type("{j["type"]}")); }}'
+        )
+        # The widest variant is the default; narrower ones apply below their width.
+        rules.append(declarations if i == 0 else f"@media (max-width: {w['width']}px) {{ {declarations} }}")
+    return "\n".join(rules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build resized WebP/JPEG variants of the images in static/")
+    parser.parse_args()
+    for name, entry in build().items():
+        smallest = min(entry["variants"], key=lambda variant: variant["bytes"])
+        widest_webp = variants_of(entry, "webp")[0]
+        print(f"{name}: {entry['bytes'] / 1024:.0f} KiB -> {widest_webp['bytes'] / 1024:.0f} KiB WebP at {widest_webp['width']}px, "
+              f"{smallest['bytes'] / 1024:.0f} KiB at {smallest['width']}px ({len(entry['variants'])} variants)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# Rolling-origin backtests of residual-load forecasters.
+#
+# For every cut-off date ("origin") from one year into the history onwards,
+# a forecaster is fitted on the days before it and forecasts the next
+# `max_horizon` days; comparing those with what happened gives, per
+# horizon, the mean absolute error, the mean absolute percentage error and
+# how often the actual value fell inside the forecast interval.
+#
+# Origins are independent, so they are spread over a process pool. The
+# history is put once into shared memory and every worker maps it read-only
+# instead of receiving a pickled copy per task; workers write their
+# forecasts straight into shared output arrays (disjoint rows per origin),
+# so nothing but origin indices goes through the pool's pipes.
+#
+# Only in-process forecasters can be backtested: the forecasting API's
+# /predict has no cut-off parameter, it always forecasts from 2020-01-01.
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from bettersave import datasets
+from bettersave.local_forecast import TARGET, LocalForecaster
+
+MIN_TRAIN_DAYS = 365
+MAX_HORIZON = 90
+ORIGIN_STEP = 7
+INTERVAL = 0.95
+SEASON_DAYS = 364  # 52 weeks: the same weekday a year earlier
+# Starting a worker (a fresh interpreter importing pandas) costs about as
+# much as fitting a few hundred origins, so small runs stay in-process.
+ORIGINS_PER_WORKER = 200
+
+
+def local(dates, values, origin, steps):
+    # The Prediction page's fallback model (harmonic regression).
+    model = LocalForecaster(interval=INTERVAL).fit(dates[:origin], values[:origin])
+    forecast = model.predict(steps, start=dates[origin])
+    return forecast["forecast"].to_numpy(), forecast["lower"].to_numpy(), forecast["upper"].to_numpy()
+
+
+def seasonal_naive(dates, values, origin, steps):
+    # Baseline: the value of the same weekday a year before each day (the
+    # forecast repeats itself beyond SEASON_DAYS), with intervals from the
+    # quantiles of the year-over-year changes seen so far.
+    history = values[:origin]
+    last_season = history[-SEASON_DAYS:]
+    forecast = last_season[np.arange(steps) % len(last_season)]
+    changes = history[SEASON_DAYS:] - history[:-SEASON_DAYS]
+    tail = (1 - INTERVAL) / 2
+    lower, upper = np.nanquantile(changes, [tail, 1 - tail]) if np.isfinite(changes).any() else (np.nan, np.nan)
+    return forecast, forecast + lower, forecast + upper
+
+
+FORECASTERS = {"local": local, "seasonal_naive": seasonal_naive}
+
+# Set in each pool worker by _attach(): name -> read-only or output array.
+# In-process runs pass their own arrays to _run() instead, so concurrent
+# sessions never share them.
+_arrays = {}
+_blocks = []
+
+
+def _share(array):
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach(specs):
+    for name, (block_name, shape, dtype) in specs.items():
+        # Spawned workers share the parent's resource tracker, and the
+        # parent unlinks the blocks once the pool is done.
+        block = SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype, buffer=block.buf)
+        if name in ("dates", "values"):
+            array.flags.writeable = False
+        _arrays[name] = array
+        _blocks.append(block)
+
+
+def _run(forecaster, origins, first_row, arrays=None):
+    # Forecasts for `origins` into rows first_row.. of the output arrays
+    # (`arrays`, or the worker's shared ones).
+    arrays = _arrays if arrays is None else arrays
+    dates = pd.DatetimeIndex(arrays["dates"])
+    values = arrays["values"]
+    steps = arrays["forecast"].shape[1]
+    fit_predict = FORECASTERS[forecaster]
+    for row, origin in enumerate(origins, first_row):
+        forecast, lower, upper = fit_predict(dates, values, origin, steps)
+        arrays["forecast"][row] = forecast
+        arrays["lower"][row] = lower
+        arrays["upper"][row] = upper
+    return len(origins)
+
+
+def history():
+    # (dates, daily residual load) of the whole history.
+    energy_cons = datasets.frame("energy_consumption")
+    return energy_cons["Start date"].to_numpy(), energy_cons[TARGET].to_numpy(dtype="float64")
+
+
+def origins_for(n, min_train=MIN_TRAIN_DAYS, step=ORIGIN_STEP):
+    # Cut-off rows: every `step` days from min_train to the last day that
+    # still has a day after it to compare with.
+    return np.arange(min_train, n - 1, step)
+
+
+def workers_for(n_origins, workers=None):
+    # Processes a run over n_origins uses; 1 means in-process.
+    if workers is None:
+        workers = min(os.cpu_count() or 1, -(-n_origins // ORIGINS_PER_WORKER))
+    return max(1, min(workers, n_origins))
+
+
+def forecasts(dates, values, origins, max_horizon=MAX_HORIZON, forecaster="local", workers=None):
+    # (forecast, lower, upper), each (origins, max_horizon). Horizons past
+    # the end of the history are forecast too; metrics() leaves them out.
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    values = np.asarray(values, dtype="float64")
+    # Forecasts start the day after the last training day, even past the end.
+    last = dates[-1] + np.arange(1, max_horizon + 1) * np.timedelta64(1, "D")
+    dates = np.concatenate([dates, last])
+    shape = (len(origins), max_horizon)
+    workers = workers_for(len(origins), workers)
+
+    if workers == 1:
+        arrays = dict(dates=dates, values=values, **{name: np.full(shape, np.nan) for name in ("forecast", "lower", "upper")})
+        _run(forecaster, origins, 0, arrays)
+        return arrays["forecast"], arrays["lower"], arrays["upper"]
+
+    blocks, specs = [], {}
+    try:
+        for name, array in [("dates", dates), ("values", values)] + [(name, np.full(shape, np.nan)) for name in ("forecast", "lower", "upper")]:
+            block, specs[name] = _share(array)
+            blocks.append(block)
+        # A few chunks per worker, so a slow chunk does not leave the others idle.
+        chunks = np.array_split(np.arange(len(origins)), min(len(origins), workers * 4))
+        # spawn: forking the threaded Streamlit server is not safe.
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=_attach, initargs=(specs,)) as pool:
+            done = [pool.submit(_run, forecaster, origins[chunk], int(chunk[0])) for chunk in chunks if len(chunk)]
+            for future in done:
+                future.result()
+        return tuple(
+            np.ndarray(shape, "float64", buffer=block.buf).copy()
+            for block in blocks[2:]
+        )
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def metrics(dates, values, origins, forecast, lower, upper):
+    # (by_horizon, by_origin) DataFrames of MAE, MAPE and interval coverage.
+    values = np.asarray(values, dtype="float64")
+    max_horizon = forecast.shape[1]
+    padded = np.concatenate([values, np.full(max_horizon, np.nan)])
+    actual = np.lib.stride_tricks.sliding_window_view(padded, max_horizon)[origins]
+    valid = np.isfinite(actual) & np.isfinite(forecast)
+    error = np.where(valid, np.abs(forecast - actual), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.where(valid & (actual != 0), error / np.abs(actual), np.nan)
+    covered = np.where(valid, (actual >= lower) & (actual <= upper), np.nan)
+
+    with warnings.catch_warnings():
+        # Horizons no origin reaches within the history are all NaN.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        by_horizon = pd.DataFrame({
+            "horizon": np.arange(1, max_horizon + 1),
+            "origins": valid.sum(axis=0),
+            "mae": np.nanmean(error, axis=0),
+            "mape": np.nanmean(ape, axis=0),
+            "coverage": np.nanmean(covered, axis=0),
+        })
+        by_origin = pd.DataFrame({
+            "origin": pd.DatetimeIndex(np.asarray(dates)[origins]),
+            "mae": np.nanmean(error, axis=1),
+            "mape": np.nanmean(ape, axis=1),
+            "coverage": np.nanmean(covered, axis=1),
+        })
+    return by_horizon[by_horizon["origins"] > 0].reset_index(drop=True), by_origin
+
+
+def run(forecaster="local", max_horizon=MAX_HORIZON, step=ORIGIN_STEP, min_train=MIN_TRAIN_DAYS, workers=None):
+    # Backtest of `forecaster` over the whole history; returns (by_horizon,
+    # by_origin, seconds).
+    start = time.perf_counter()
+    dates, values = history()
+    origins = origins_for(len(values), min_train, step)
+    forecast, lower, upper = forecasts(dates, values, origins, max_horizon, forecaster, workers)
+    by_horizon, by_origin = metrics(dates, values, origins, forecast, lower, upper)
+    return by_horizon, by_origin, time.perf_counter() - start
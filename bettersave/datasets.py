@@ -0,0 +1,81 @@
+# Process-wide, read-only copies of the energy datasets.
+#
+# st.cache_data pickles what it caches and hands every caller a fresh
+# unpickled copy, so each rerun of each session used to hold its own copy
+# of both datasets. Here every dataset is held once per process: an Arrow
+# table whose columns point into the memory-mapped files of
+# bettersave/storage.py, plus the calendar columns the pages need (Year,
+# Month, ISO Week), computed once when the dataset version changes.
+#
+# frame() returns a pandas view of that table. Its column arrays are the
+# Arrow buffers themselves (no copy) and are read-only, so a caller that
+# writes into a value raises instead of changing the data for everyone.
+# Adding or replacing columns only changes the caller's own view.
+#
+# See benchmarks/session_memory.py for memory per session as sessions grow.
+import threading
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from bettersave import storage
+
+
+def with_calendar(table):
+    # Year, Month and ISO Week of each row's "Start date", as int32 columns.
+    start = table["Start date"]
+    iso = pc.iso_calendar(start)
+    return (
+        table
+        .append_column("Year", pc.year(start).cast(pa.int32()))
+        .append_column("Month", pc.month(start).cast(pa.int32()))
+        .append_column("Week", iso.combine_chunks().field("iso_week").cast(pa.int32()))
+    )
+
+
+class Datasets:
+    def __init__(self, version):
+        self.version = version
+        self.tables = {}
+        self.frames = {}
+        for name in storage.DATASETS:
+            # A dataset with delta segments is several chunks; combining them
+            # costs one copy per process, after which reads are zero-copy again.
+            table = storage.read_table(name)
+            if table.column(0).num_chunks > 1:
+                table = table.combine_chunks()
+            self.tables[name] = with_calendar(table)
+            # split_blocks keeps one block per column, so pandas wraps the
+            # Arrow buffers instead of consolidating them into new arrays.
+            self.frames[name] = self.tables[name].to_pandas(split_blocks=True)
+
+    def table(self, name):
+        return self.tables[name]
+
+    def frame(self, name):
+        # Shallow copy: shares the column arrays, not the column list.
+        return self.frames[name].copy(deep=False)
+
+    @property
+    def nbytes(self):
+        # Bytes referenced by the tables, whether mapped from disk or computed.
+        return sum(table.nbytes for table in self.tables.values())
+
+
+_lock = threading.Lock()
+_shared = None
+
+
+def shared(version=None):
+    # The process's Datasets for the current dataset version; replaced (and
+    # the old one released once no caller holds it) when the files change.
+    global _shared
+    version = version or storage.dataset_version()
+    with _lock:
+        if _shared is None or _shared.version != version:
+            _shared = Datasets(version)
+        return _shared
+
+
+def frame(name, version=None):
+    return shared(version).frame(name)
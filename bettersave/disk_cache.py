@@ -0,0 +1,159 @@
+# File-backed cache shared by every replica that mounts the same directory.
+#
+# st.cache_data and st.cache_resource are per process, so each Streamlit
+# replica used to build the rollups and call the forecasting API for every
+# horizon on its own. Values cached here are pickled to one file per key
+# under BETTERSAVE_CACHE_DIR (default data/cache/), written to a temporary
+# file and renamed into place, so readers on any replica see either the old
+# value or the new one, never a partial write. Each value carries its expiry
+# time; expired files are treated as missing and removed by prune(), which
+# put() runs at most every PRUNE_INTERVAL_S (and the start-up warm-up once,
+# see bettersave/startup.py). prune() also keeps the directory under
+# max_bytes by removing the least recently written values first.
+#
+# get_or_compute() also coordinates replicas missing the same key at the
+# same time: the first one takes a lease (a lock file created with O_EXCL)
+# and computes, the others wait for its value instead of repeating the work.
+# A lease older than LEASE_S is considered abandoned and broken.
+import hashlib
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+from bettersave import storage
+
+CACHE_DIR = Path(os.environ.get("BETTERSAVE_CACHE_DIR", storage.DATA_DIR / "cache"))
+DEFAULT_TTL = 3600
+LEASE_S = 60
+MAX_BYTES = 256 * 2**20
+PRUNE_INTERVAL_S = 600
+POLL_S = 0.05
+
+_MISSING = object()
+
+
+class DiskCache:
+    def __init__(self, directory=CACHE_DIR, ttl=DEFAULT_TTL, lease=LEASE_S, max_bytes=MAX_BYTES):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.lease = lease
+        self.max_bytes = max_bytes
+        self.pruned_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.computes = 0
+
+    def path(self, namespace, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.directory / namespace / f"{digest}.pkl"
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                expires, value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return _MISSING
+        return value if expires > time.time() else _MISSING
+
+    def _count(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, namespace, key, default=None):
+        value = self._read(self.path(namespace, key))
+        self._count(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def put(self, namespace, key, value, ttl=None):
+        path = self.path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((time.time() + (self.ttl if ttl is None else ttl), value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        with self.lock:
+            due = time.monotonic() - self.pruned_at > PRUNE_INTERVAL_S
+            if due:
+                self.pruned_at = time.monotonic()
+        if due:
+            self.prune()
+
+    def _acquire(self, lock_path):
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime > self.lease:
+                    lock_path.unlink()
+            except FileNotFoundError:
+                pass
+            return False
+
+    def get_or_compute(self, namespace, key, compute, ttl=None):
+        path = self.path(namespace, key)
+        value = self._read(path)
+        self._count(value is not _MISSING)
+        if value is not _MISSING:
+            return value
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = path.with_suffix(".lock")
+        deadline = time.monotonic() + self.lease
+        owner = self._acquire(lock_path)
+        while not owner:
+            # Another replica (or thread) is computing this key.
+            time.sleep(POLL_S)
+            value = self._read(path)
+            if value is not _MISSING:
+                return value
+            if time.monotonic() > deadline:
+                # Give up waiting and compute without the lease.
+                break
+            owner = self._acquire(lock_path)
+        try:
+            # The holder may have finished between our read and our lease.
+            value = self._read(path)
+            if value is _MISSING:
+                value = compute()
+                with self.lock:
+                    self.computes += 1
+                self.put(namespace, key, value, ttl)
+            return value
+        finally:
+            if owner:
+                try:
+                    lock_path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def prune(self):
+        # Removes expired values and leftover temporary files, then the
+        # oldest values beyond max_bytes; returns how many files were
+        # removed. Files other replicas remove meanwhile are skipped.
+        removed = 0
+        kept = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+                stale = path.suffix == ".tmp" and time.time() - stat.st_mtime > self.lease
+                if stale or (path.suffix == ".pkl" and self._read(path) is _MISSING):
+                    path.unlink()
+                    removed += 1
+                elif path.suffix == ".pkl":
+                    kept.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                pass
+        total = 0
+        for _, size, path in sorted(kept, reverse=True):
+            total += size
+            if total > self.max_bytes:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
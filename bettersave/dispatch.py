@@ -0,0 +1,83 @@
+# Battery-storage dispatch over the daily surplus/deficit history.
+#
+# A store charges from the day's renewable surplus and discharges to cover
+# the day's deficit (grid load not met by generation), limited by its
+# energy capacity, its charge and discharge power and its round-trip
+# efficiency (applied half on the way in, half on the way out).
+#
+# Every configuration is simulated at once: the state of charge is a vector
+# with one entry per configuration and each day is a handful of
+# element-wise NumPy operations over it, so the only Python loop is over
+# days, never over configurations.
+import numpy as np
+import pandas as pd
+
+from bettersave import datasets, surplus
+
+HOURS_PER_DAY = 24
+
+
+def daily_balance():
+    # (dates, surplus MWh, deficit MWh) per day of the history.
+    daily = surplus.daily_surplus(datasets.frame("energy_generation"), datasets.frame("energy_consumption"))
+    deficit = np.clip(daily["load"].to_numpy() - daily["generation"].to_numpy(), 0, None)
+    return daily.index, daily["surplus"].to_numpy(), deficit
+
+
+def config_grid(capacity_mwh, charge_mw, efficiency, discharge_mw=None):
+    # Cartesian product of the parameter values as a flat DataFrame. Without
+    # discharge_mw the stores discharge at the same power they charge at.
+    symmetric = discharge_mw is None
+    capacity, charge, discharge, eta = np.meshgrid(
+        capacity_mwh, charge_mw, [0] if symmetric else discharge_mw, efficiency, indexing="ij"
+    )
+    return pd.DataFrame({
+        "capacity_mwh": capacity.ravel(),
+        "charge_mw": charge.ravel(),
+        "discharge_mw": (charge if symmetric else discharge).ravel(),
+        "efficiency": eta.ravel(),
+    })
+
+
+def simulate(surplus_mwh, deficit_mwh, configs, initial_soc=0.0, record_soc=False):
+    # configs: DataFrame from config_grid() (or any frame with its columns).
+    # Returns one row of results per configuration, and the state of charge
+    # per day and configuration (days x configs) when record_soc is set.
+    capacity = configs["capacity_mwh"].to_numpy(dtype="float64")
+    charge_limit = configs["charge_mw"].to_numpy(dtype="float64") * HOURS_PER_DAY
+    discharge_limit = configs["discharge_mw"].to_numpy(dtype="float64") * HOURS_PER_DAY
+    leg_efficiency = np.sqrt(configs["efficiency"].to_numpy(dtype="float64"))
+
+    soc = capacity * initial_soc
+    charged = np.zeros_like(capacity)
+    delivered = np.zeros_like(capacity)
+    headroom = np.empty_like(capacity)
+    energy = np.empty_like(capacity)
+    soc_history = np.empty((len(surplus_mwh), len(capacity))) if record_soc else None
+
+    for day, (available, needed) in enumerate(zip(surplus_mwh, deficit_mwh)):
+        if available > 0:
+            # Energy drawn from the grid, limited by power and free capacity.
+            np.subtract(capacity, soc, out=headroom)
+            np.divide(headroom, leg_efficiency, out=headroom)
+            np.minimum(charge_limit, headroom, out=energy)
+            np.minimum(energy, available, out=energy)
+            charged += energy
+            soc += energy * leg_efficiency
+        if needed > 0:
+            # Energy delivered to the grid, limited by power and stored energy.
+            np.multiply(soc, leg_efficiency, out=headroom)
+            np.minimum(discharge_limit, headroom, out=energy)
+            np.minimum(energy, needed, out=energy)
+            delivered += energy
+            soc -= energy / leg_efficiency
+        if record_soc:
+            soc_history[day] = soc
+
+    results = configs.reset_index(drop=True).copy()
+    results["charged_mwh"] = charged
+    results["delivered_mwh"] = delivered
+    results["surplus_captured"] = charged / max(surplus_mwh.sum(), 1e-9)
+    results["deficit_covered"] = delivered / max(deficit_mwh.sum(), 1e-9)
+    results["full_cycles"] = np.divide(delivered, capacity, out=np.zeros_like(delivered), where=capacity > 0)
+    return results, soc_history
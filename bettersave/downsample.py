@@ -0,0 +1,101 @@
+# Downsampling of long time series for plotting.
+#
+# A chart only has a few hundred to a couple of thousand pixels across, so
+# sending every point of a daily (1,826 per series) or quarter-hour
+# (~175,000) series to the browser costs payload and render time without
+# showing more. Two reductions are provided, both on NumPy arrays:
+#
+# - lttb(): Largest-Triangle-Three-Buckets picks, per bucket, the point that
+#   spans the largest triangle with its neighbours, so peaks, dips and the
+#   overall shape survive. It returns indices into the input.
+# - envelope(): the minimum and maximum of every bucket, to draw as a band
+#   behind the line so no extreme is lost between the picked points.
+#
+# window() slices a series to the visible date window and picks the output
+# resolution from it, so the number of points sent stays bounded whatever
+# the length of the data or of the window.
+import numpy as np
+
+# Points per series sent to the browser: about one per two pixels of a wide
+# chart, which LTTB keeps visually identical to the full series.
+MAX_POINTS = 800
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def lttb(x, y, n_out):
+    # Indices of the n_out points that best keep the shape of (x, y). The
+    # first and last points are always kept; between them every bucket
+    # contributes one point.
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype="float64")
+
+    # n_out - 2 buckets over the points between the first and the last.
+    edges = np.linspace(1, n - 1, n_out - 1).astype("int64")
+    counts = np.diff(edges)
+    # Centroid of every bucket, for the triangle's third corner.
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    picked = np.empty(n_out, dtype="int64")
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        # Twice the triangle areas (a, point, next centroid), for every point.
+        area = np.abs(
+            (x[a] - mean_x[bucket]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (mean_y[bucket] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        picked[bucket + 1] = a
+    return picked
+
+
+def envelope(x, y, n_buckets):
+    # (bucket start x, bucket min, bucket max) over n_buckets equal buckets.
+    n = len(y)
+    y = np.asarray(y, dtype="float64")
+    if n_buckets >= n:
+        return np.asarray(x), y, y
+    starts = np.linspace(0, n, n_buckets, endpoint=False).astype("int64")
+    return np.asarray(x)[starts], np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+
+def window(x, start, end):
+    # Slice bounds of the sorted x values within [start, end].
+    x = np.asarray(x)
+    return int(np.searchsorted(x, np.asarray(start, dtype=x.dtype), "left")), \
+        int(np.searchsorted(x, np.asarray(end, dtype=x.dtype), "right"))
+
+
+def resolution(n, max_points=MAX_POINTS):
+    # Points to draw for a window of n points: all of them if they fit.
+    return min(n, max_points)
+
+
+def plot_dates(x):
+    # Dates at the coarsest unit that keeps them exact. Plotly writes
+    # datetime64[ns] values as 29-character strings; whole days as
+    # "2015-01-01" take a third of the payload.
+    x = np.asarray(x)
+    for unit in ("D", "m"):
+        coarse = x.astype(f"datetime64[{unit}]")
+        if np.array_equal(coarse.astype(x.dtype), x):
+            return coarse
+    return x
+
+
+def ticks(n, max_ticks=24):
+    # Evenly spaced positions for at most max_ticks axis labels.
+    return np.unique(np.linspace(0, n - 1, min(n, max_ticks)).round().astype("int64")) if n else np.arange(0)
@@ -0,0 +1,199 @@
+# Bulk exports of the datasets and forecasts, written in streamed chunks.
+#
+# st.download_button needs the whole payload as bytes and keeps it in the
+# server's memory for as long as the page shows the button. Exports are
+# written here instead: record batches of at most CHUNK_ROWS rows go one at
+# a time through a pyarrow writer (Arrow IPC or Parquet, zstd-compressed,
+# or CSV through a gzip stream) into static/exports/, and the page links to
+# the file, which Streamlit's static file server (see bettersave/assets.py)
+# sends from disk in 64 KiB chunks. Neither side ever holds the whole
+# export in memory.
+#
+# Daily data is sliced from the process's shared Arrow tables without a
+# copy. Hourly and quarter-hour data is scanned from the year/month
+# partitions of bettersave/partitions.py, one month at a time, so exporting
+# years of high-resolution data costs one partition in memory.
+#
+# Files are named by what they contain (dataset version, filter, format),
+# so an export asked for again, by any session, is served as already
+# written. The oldest exports are removed beyond MAX_BYTES.
+#
+# The static file server refuses files over STATIC_MAX_BYTES (404), which a
+# full CSV export can reach; the pages show servable() exports as links and
+# say so for the others.
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from bettersave import datasets, partitions, storage
+
+EXPORT_DIR = storage.ROOT / "static" / "exports"
+URL_PREFIX = "app/static/exports"
+CHUNK_ROWS = 64 * 1024
+MAX_BYTES = 512 * 2**20
+# Streamlit's MAX_APP_STATIC_FILE_SIZE
+STATIC_MAX_BYTES = 200 * 2**20
+
+# format -> (file extension, label)
+FORMATS = {
+    "parquet": ("parquet", "Parquet"),
+    "arrow": ("arrow", "Arrow IPC"),
+    "csv.gz": ("csv.gz", "CSV (gzip)"),
+}
+
+_lock = threading.Lock()
+
+
+def label(fmt):
+    return FORMATS[fmt][1]
+
+
+def write(path, batches, schema, fmt):
+    # Streams the record batches into `path` in the given format.
+    if fmt == "parquet":
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif fmt == "arrow":
+        options = ipc.IpcWriteOptions(compression="zstd")
+        with pa.OSFile(str(path), "wb") as sink, ipc.new_file(sink, schema, options=options) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif fmt == "csv.gz":
+        with pa.CompressedOutputStream(str(path), "gzip") as sink, pa_csv.CSVWriter(sink, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    else:
+        raise ValueError(f"Unknown export format {fmt!r}")
+
+
+def export(name, key, fmt, source):
+    # The export `name`.<ext> identified by `key`: written from source() ->
+    # (batches, schema) unless a file with the same key exists. Returns
+    # {"file", "download", "bytes"}.
+    extension = FORMATS[fmt][0]
+    digest = hashlib.sha1(json.dumps([name, key, fmt], default=str).encode()).hexdigest()[:12]
+    path = EXPORT_DIR / f"{name}.{digest}.{extension}"
+    if path.exists():
+        # Marks it recently used for prune().
+        os.utime(path)
+    else:
+        # Written to a file of its own outside the lock, so sessions do not
+        # wait on each other's exports; two writing the same one at once
+        # produce the same bytes, and the first rename wins.
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        batches, schema = source()
+        try:
+            write(tmp, batches, schema, fmt)
+            with _lock:
+                if not path.exists():
+                    os.replace(tmp, path)
+                prune(keep=path)
+        finally:
+            tmp.unlink(missing_ok=True)
+    return {"file": path.name, "download": f"{name}.{extension}", "bytes": path.stat().st_size}
+
+
+def prune(keep=None, max_bytes=MAX_BYTES):
+    # Removes the least recently used exports beyond max_bytes. Files being
+    # written (.tmp) are left alone; a file removed meanwhile is skipped.
+    files = []
+    for path in EXPORT_DIR.glob("*"):
+        if path.suffix == ".tmp":
+            continue
+        try:
+            files.append((path.stat(), path))
+        except FileNotFoundError:
+            continue
+    total = 0
+    for stat, path in sorted(files, key=lambda item: item[0].st_mtime, reverse=True):
+        total += stat.st_size
+        if total > max_bytes and path != keep:
+            path.unlink(missing_ok=True)
+
+
+def url(item):
+    return f"{URL_PREFIX}/{item['file']}"
+
+
+def size_text(nbytes):
+    return f"{nbytes / 2**20:.1f} MiB" if nbytes >= 2**20 else f"{nbytes / 1024:.0f} KiB"
+
+
+def servable(item):
+    return item["bytes"] <= STATIC_MAX_BYTES
+
+
+def link_html(item, text=None):
+    # A download link; `download` makes the browser save the file under its
+    # plain name whatever content type the static server sends.
+    text = text or item["download"]
+    return f'<a href="{url(item)}" download="{item["download"]}">⬇️ {text}</a> ({size_text(item["bytes"])})'
+
+
+def too_large_text(item):
+    return (
+        f"{item['download']} is {size_text(item['bytes'])}, more than the {size_text(STATIC_MAX_BYTES)} "
+        "the server can send. Pick fewer years or a lower resolution."
+    )
+
+
+def daily_batches(name, first_year, last_year):
+    # The dataset's rows of first_year..last_year as zero-copy slices of the
+    # shared table, in its stored columns.
+    table = datasets.shared().table(name)
+    years = table["Year"].to_numpy()
+    lo, hi = np.searchsorted(years, first_year, "left"), np.searchsorted(years, last_year, "right")
+    columns = [column for column in table.column_names if column not in storage.DERIVED_COLUMNS]
+    selected = table.select(columns).slice(lo, hi - lo)
+    return selected.to_batches(max_chunksize=CHUNK_ROWS), selected.schema
+
+
+def partitioned_batches(name, resolution, first_year, last_year):
+    # The partitioned dataset's rows, one month's partition at a time in
+    # date order, without the partition key columns.
+    dataset = partitions.open_dataset(name, resolution)
+    columns = [field.name for field in dataset.schema if field.name not in ("year", "month")]
+    schema = pa.schema([dataset.schema.field(column) for column in columns])
+
+    def batches():
+        for year in partitions.years(name, resolution):
+            if not first_year <= year <= last_year:
+                continue
+            for month in range(1, 13):
+                month_filter = (ds.field("year") == year) & (ds.field("month") == month)
+                yield from dataset.to_batches(columns=columns, filter=month_filter, batch_size=CHUNK_ROWS)
+
+    return batches(), schema
+
+
+def export_dataset(name, first_year, last_year, fmt, resolution="day"):
+    stem = f"{name}_{first_year}-{last_year}" + ("" if resolution == "day" else f"_{resolution}")
+    if resolution == "day":
+        key = (storage.dataset_version(), first_year, last_year)
+        return export(stem, key, fmt, lambda: daily_batches(name, first_year, last_year))
+    # The directory's mtime changes when an export is re-ingested.
+    key = (partitions.partition_path(name, resolution).stat().st_mtime_ns, first_year, last_year)
+    return export(stem, key, fmt, lambda: partitioned_batches(name, resolution, first_year, last_year))
+
+
+def export_frame(name, frame, fmt):
+    # A small pandas frame (e.g. a forecast), keyed by its content.
+    content = hashlib.sha1(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes()).hexdigest()
+
+    def source():
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        return table.to_batches(max_chunksize=CHUNK_ROWS), table.schema
+
+    return export(name, (content, list(frame.columns)), fmt, source)
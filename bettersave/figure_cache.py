@@ -0,0 +1,92 @@
+# Built Plotly figures shared by every session, keyed by chart, parameters
+# and dataset version.
+#
+# Building a figure with plotly.express costs tens of milliseconds (trace
+# validation, templating), while handing a built Figure to st.plotly_chart
+# costs about two: it is serialized as is. JSON or dict payloads would not
+# help, because st.plotly_chart validates those into a new Figure again
+# (~12 ms for the Dashboard's line chart). So the Figure objects themselves
+# are cached; st.plotly_chart only reads them, so sessions can share them.
+#
+# prebuild() fills the cache for the parameter values people actually pick
+# (e.g. every year range of the Dashboard's slider) on a background thread,
+# so interactions find their figure ready.
+import logging
+import threading
+import time
+from collections import deque
+
+import cachetools
+
+MAX_FIGURES = 256
+PREBUILD_PAUSE_S = 0.02
+
+logger = logging.getLogger(__name__)
+
+
+class FigureCache:
+    def __init__(self, version, max_figures=MAX_FIGURES):
+        self.version = version
+        self.lock = threading.Lock()
+        self.figures = cachetools.LRUCache(maxsize=max_figures)
+        # One lock per key being built, so concurrent misses build it once.
+        self.building = {}
+        self.pending = deque()
+        self.worker = None
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, chart, params, build):
+        # The figure for (chart, params) at this dataset version, built with
+        # build(*params) on a miss. Callers must not modify it.
+        key = (chart, params)
+        with self.lock:
+            figure = self.figures.get(key)
+            if figure is not None:
+                self.hits += 1
+                return figure
+            key_lock = self.building.setdefault(key, threading.Lock())
+        with key_lock:
+            with self.lock:
+                figure = self.figures.get(key)
+            if figure is None:
+                figure = build(*params)
+                with self.lock:
+                    self.figures[key] = figure
+                    self.builds += 1
+                    self.building.pop(key, None)
+            return figure
+
+    def prebuild(self, chart, params_list, build):
+        # Queues every (chart, params) to be built in the background. One
+        # thread works through the queue in order, pausing between figures
+        # so reruns served meanwhile are not starved of the GIL.
+        with self.lock:
+            self.pending.extend((chart, params, build) for params in params_list)
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._prebuild, name="figure-prebuild", daemon=True)
+                self.worker.start()
+            return self.worker
+
+    def _prebuild(self):
+        # A figure that fails to build is logged and skipped; the page that
+        # asks for it builds it again (and shows the error) itself.
+        try:
+            while True:
+                with self.lock:
+                    if not self.pending:
+                        self.worker = None
+                        return
+                    chart, params, build = self.pending.popleft()
+                try:
+                    self.get(chart, params, build)
+                except Exception:
+                    logger.exception("Prebuilding the %s figure for %r failed", chart, params)
+                time.sleep(PREBUILD_PAUSE_S)
+        finally:
+            with self.lock:
+                if self.worker is threading.current_thread():
+                    self.worker = None
+
+    def __len__(self):
+        return len(self.figures)
@@ -0,0 +1,87 @@
+# Horizon-superset cache for remote forecasts.
+#
+# A forecast for N days starts with the forecast for every shorter horizon,
+# so the cache keeps only the longest horizon fetched so far and answers
+# shorter requests by slicing it. The backend is called again only when a
+# longer horizon is asked for, when the caller reports a different model
+# version, or when the cached forecast is older than `ttl` seconds.
+#
+# Fetches in flight are shared the same way: a request for a horizon that
+# a running fetch will cover (e.g. 30 days while the background warm-up is
+# fetching 365) waits for that fetch and slices it, instead of making a
+# second upstream call.
+import threading
+import time
+from concurrent.futures import Future
+
+
+class ForecastCache:
+    def __init__(self, fetch, ttl=3600):
+        # fetch(steps) -> DataFrame with one row per forecast day, or None on
+        # failure. A "model_version" in the frame's attrs is remembered.
+        self.fetch = fetch
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.frame = None
+        self.model_version = None
+        self.fetched_at = 0.0
+        self.backend_calls = 0
+        # fetch horizon -> (model version asked for, Future of the frame),
+        # while the fetch runs
+        self.pending = {}
+
+    def _usable(self, model_version):
+        return (
+            self.frame is not None
+            and time.monotonic() - self.fetched_at < self.ttl
+            and (model_version is None or model_version == self.model_version)
+        )
+
+    def horizon(self, model_version=None):
+        # Longest horizon that can currently be served without a fetch.
+        with self.lock:
+            return len(self.frame) if self._usable(model_version) else 0
+
+    def _covering(self, steps, model_version):
+        covering = [
+            horizon for horizon, (version, _) in self.pending.items()
+            if horizon >= steps and (model_version is None or version == model_version)
+        ]
+        return self.pending[min(covering)][1] if covering else None
+
+    def get(self, steps, model_version=None):
+        with self.lock:
+            if self._usable(model_version) and len(self.frame) >= steps:
+                return self.frame.iloc[:steps].copy()
+            future = self._covering(steps, model_version)
+            leader = future is None
+            if leader:
+                # Never shrink what is cached: a request for a longer horizon
+                # of the same model also covers everything asked for before.
+                fetch_steps = max(steps, len(self.frame) if self._usable(model_version) else 0)
+                future = Future()
+                self.pending[fetch_steps] = (model_version, future)
+        if not leader:
+            frame = future.result()
+            return None if frame is None else frame.iloc[:steps].copy()
+
+        try:
+            frame = self.fetch(fetch_steps)
+            future.set_result(frame)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self.lock:
+                if self.pending.get(fetch_steps, (None, None))[1] is future:
+                    del self.pending[fetch_steps]
+        if frame is None:
+            return None
+
+        with self.lock:
+            self.backend_calls += 1
+            if self.frame is None or len(frame) >= len(self.frame) or not self._usable(model_version):
+                self.frame = frame.reset_index(drop=True)
+                self.model_version = frame.attrs.get("model_version", model_version)
+                self.fetched_at = time.monotonic()
+        return frame.iloc[:steps].copy()
@@ -0,0 +1,132 @@
+# The forecasting objects of one server process, shared by every session
+# and every page.
+#
+# The prediction client, the disk cache, the ForecastCache and the
+# ForecastStore used to be st.cache_resource functions of the Prediction
+# page, which only that page's script could reach. Held here, the start-up
+# warm-up (bettersave/startup.py) can fetch popular horizons as soon as the
+# process boots, so the first person to open the Prediction page does not
+# wait for the forecasting service's cold start.
+#
+# Set BETTERSAVE_WARM_HORIZONS to change what is warmed (comma-separated
+# days; empty turns the warm-up off).
+#
+# Cached forecasts belong to the model version the API reported with them.
+# While the page is in use, the version is re-checked in the background with
+# a 1-day forecast at most every VERSION_CHECK_S; once the API reports a new
+# one, lookups miss the forecasts of the old model (in the ForecastCache and
+# the disk cache alike) instead of serving them until the TTL runs out. An
+# API that reports no version is not probed again.
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bettersave import prediction_client
+from bettersave.disk_cache import DiskCache
+from bettersave.forecast_cache import ForecastCache
+from bettersave.forecast_store import ForecastStore
+
+logger = logging.getLogger(__name__)
+
+TTL = 3600
+WORKERS = 4
+VERSION_CHECK_S = 300
+
+# The slider's default first, then its maximum, which covers every other
+# horizon (shorter ones are sliced from it).
+WARM_HORIZONS = tuple(
+    int(days) for days in os.environ.get("BETTERSAVE_WARM_HORIZONS", "30,365").split(",") if days.strip()
+)
+
+
+class ForecastService:
+    def __init__(self, api_url=prediction_client.API_URL, ttl=TTL, workers=WORKERS):
+        self.api_url = api_url
+        self.client = prediction_client.PredictionClient(api_url)
+        self.disk_cache = DiskCache(ttl=ttl)
+        self.cache = ForecastCache(self.request, ttl=ttl)
+        self.store = ForecastStore()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prediction")
+        self.lock = threading.Lock()
+        self.warming = None
+        self.model_version = None
+        self.versioned = True
+        self.version_checked = time.monotonic()
+        self.checking = None
+
+    def request(self, steps):
+        # One backend call per horizon and model version per hour across replicas.
+        key = (self.api_url, steps, self.model_version)
+        frame = self.disk_cache.get_or_compute("forecast", key, lambda: self.client.predict(steps))
+        self._saw(frame)
+        return frame
+
+    def forecast(self, steps):
+        # The forecast for `steps` days from the current model (None on failure).
+        return self.cache.get(steps, self.current_model_version())
+
+    def current_model_version(self):
+        # The model version the API last reported (None until it reports
+        # one); starts a background re-check when one is due.
+        with self.lock:
+            due = self.versioned and time.monotonic() - self.version_checked > VERSION_CHECK_S
+            if due and (self.checking is None or self.checking.done()):
+                self.version_checked = time.monotonic()
+                self.checking = self.executor.submit(self._check_version)
+            return self.model_version
+
+    def _check_version(self):
+        try:
+            frame = self.client.predict(1)
+        except requests.RequestException as exc:
+            logger.warning("Could not check the forecasting model's version: %s", exc)
+            return
+        with self.lock:
+            if frame.attrs.get("model_version") is None:
+                self.versioned = False
+        self._saw(frame)
+
+    def _saw(self, frame):
+        version = None if frame is None else frame.attrs.get("model_version")
+        if version is not None:
+            with self.lock:
+                if version != self.model_version:
+                    logger.info("Forecasting model version %s", version)
+                self.model_version = version
+
+    def warm_up(self, horizons=WARM_HORIZONS):
+        # Fetches `horizons` in order on a worker, once per process; returns
+        # the Future of the horizons that were warmed.
+        with self.lock:
+            if self.warming is None and horizons:
+                self.warming = self.executor.submit(self._warm, horizons)
+            return self.warming
+
+    def _warm(self, horizons):
+        warmed = []
+        for steps in horizons:
+            try:
+                if self.forecast(steps) is not None:
+                    warmed.append(steps)
+            except requests.RequestException as exc:
+                # The page reports it again to whoever asks for the horizon.
+                logger.warning("Could not warm the %d-day forecast: %s", steps, exc)
+            except Exception:
+                logger.exception("Warming the %d-day forecast failed", steps)
+        return warmed
+
+
+_lock = threading.Lock()
+_shared = None
+
+
+def shared():
+    global _shared
+    with _lock:
+        if _shared is None:
+            _shared = ForecastService()
+        return _shared
@@ -0,0 +1,79 @@
+# Process-wide store of prepared forecast frames, shared by all sessions.
+#
+# Sessions used to keep their own copy of the forecast in
+# st.session_state.data for as long as they lived, and patch it ("Date"
+# re-parsed, "Year"/"Month" added) on every rerun. Now a session keeps only
+# the key of its forecast, (horizon, model version), and reads the frame
+# from this store. Identical forecasts are held once, prepared once, and the
+# store is an LRU bounded by the bytes of the frames it holds: when it is
+# full the least recently viewed forecasts are dropped, and a session whose
+# forecast was dropped fetches it again (normally a slice of the
+# ForecastCache, no backend call).
+import threading
+
+import cachetools
+import pandas as pd
+
+MAX_BYTES = 32 * 2**20
+
+
+def frame_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def prepare(frame):
+    # The columns the Prediction page plots, computed once per forecast.
+    data = frame.copy()
+    data["Date"] = pd.to_datetime(data["Date"], errors="coerce")
+    data = data.dropna(subset=["Date"]).reset_index(drop=True)
+    data["Year"] = data["Date"].dt.year
+    data["Month"] = data["Date"].dt.strftime("%b")
+    data.attrs = dict(frame.attrs)
+    return data
+
+
+def forecast_key(frame):
+    return len(frame), frame.attrs.get("model_version")
+
+
+class ForecastStore:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.lock = threading.Lock()
+        self.frames = cachetools.LRUCache(maxsize=max_bytes, getsizeof=frame_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, frame):
+        # Stores the prepared frame and returns (key, prepared frame). A
+        # forecast already held under the same key is kept, not duplicated.
+        key = forecast_key(frame)
+        with self.lock:
+            stored = self.frames.get(key)
+            if stored is not None:
+                return key, stored
+        data = prepare(frame)
+        with self.lock:
+            try:
+                self.frames[key] = data
+            except ValueError:
+                # Larger than the whole store: hand it out without keeping it.
+                pass
+        return key, data
+
+    def get(self, key):
+        # The prepared frame for `key`, or None if it was never stored or
+        # has been evicted. Callers must not modify the frame.
+        with self.lock:
+            data = self.frames.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return data
+
+    @property
+    def nbytes(self):
+        return self.frames.currsize
+
+    def __len__(self):
+        return len(self.frames)
@@ -0,0 +1,109 @@
+# Debounced, non-blocking forecast loading for one session.
+#
+# The Prediction page asks for the horizon under its slider on every rerun.
+# A HorizonLoader turns that into at most one fetch at a time per session,
+# without blocking the script thread: request() returns a Future at once,
+# and the fetch starts only once the slider has rested for DEBOUNCE_S, so
+# stepping through many values fetches the last one only.
+#
+# Asking for another horizon supersedes the previous request, which is
+# cancelled if it is still debouncing or queued for a worker. A request
+# already on the wire is left to finish: other sessions may be waiting on
+# the same upstream call (PredictionClient and ForecastCache coalesce them)
+# and its result still fills the shared caches. Only this session stops
+# waiting for it.
+#
+# The fetch outlives the rerun that asked for it, so when that rerun is
+# traced the fetch gets a trace of its own (tracing.detached); the rerun
+# that finds it finished adds its spans with tracing.adopt(loader.take_trace()).
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+
+from bettersave import tracing
+
+DEBOUNCE_S = 0.3
+
+
+class HorizonLoader:
+    def __init__(self, fetch, executor, debounce=DEBOUNCE_S):
+        # fetch(steps) -> forecast frame (or None), run on the executor.
+        self.fetch = fetch
+        self.executor = executor
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.steps = None
+        self.future = None
+        self.timer = None
+        self.inner = None
+        self.trace = None
+        self.requested_at = 0.0
+        self.started = 0
+        self.cancelled = 0
+
+    def request(self, steps):
+        # The Future of the forecast for `steps`; the same one on every
+        # rerun until another horizon is requested.
+        with self.lock:
+            if self.future is not None and self.steps == steps:
+                return self.future
+            self._supersede()
+            self.steps = steps
+            self.requested_at = time.monotonic()
+            future = self.future = Future()
+            fetch, self.trace = tracing.detached(self.fetch, f"fetch {steps}")
+            self.timer = threading.Timer(self.debounce, self._start, (future, fetch, steps))
+            self.timer.daemon = True
+            self.timer.start()
+        return future
+
+    def age(self):
+        # Seconds since the current request was made, debounce included.
+        return time.monotonic() - self.requested_at
+
+    def take_trace(self):
+        # The trace of the current fetch once it has finished (None if it
+        # was not traced); handed out once.
+        with self.lock:
+            if self.future is None or not self.future.done():
+                return None
+            trace, self.trace = self.trace, None
+            return trace
+
+    def cancel(self):
+        # Drops the current request, e.g. once the horizon can be served
+        # from a cache without it.
+        with self.lock:
+            self._supersede()
+            self.steps = self.future = self.timer = self.inner = self.trace = None
+
+    def _supersede(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.future is None or self.future.done():
+            return
+        # Still debouncing, or queued behind other fetches.
+        if self.future.cancel() or (self.inner is not None and self.inner.cancel()):
+            self.cancelled += 1
+
+    def _start(self, future, fetch, steps):
+        if not future.set_running_or_notify_cancel():
+            return
+        with self.lock:
+            if future is not self.future:
+                # Superseded while the timer was firing.
+                self.cancelled += 1
+                future.set_exception(CancelledError())
+                return
+            inner = self.inner = self.executor.submit(fetch, steps)
+            self.started += 1
+        inner.add_done_callback(lambda done: _resolve(future, done))
+
+
+def _resolve(future, done):
+    if done.cancelled():
+        future.set_exception(CancelledError())
+    elif done.exception() is not None:
+        future.set_exception(done.exception())
+    else:
+        future.set_result(done.result())
@@ -0,0 +1,190 @@
+# Ingest raw SMARD exports (smard.de "Actual consumption" / "Actual
+# generation" downloads) into the columnar datasets read by the pages.
+#
+#     python -m bettersave.ingest Actual_consumption_201501010000_202001020000_Day.csv
+#     python -m bettersave.ingest --append Actual_consumption_<new days>.csv
+#
+# The default mode rebuilds the dataset from the export. --append keeps the
+# existing history and adds only rows ending after the dataset's watermark,
+# then updates the persisted year/month/week rollup for just those rows, so a
+# daily refresh costs time proportional to the new rows.
+#
+# SMARD files are semicolon-separated, start with a BOM, write dates as
+# "Jan 1, 2015" (or "Jan 1, 2015 12:00 AM" for hourly and quarter-hour
+# resolutions), use "," as thousands separator and "-" for missing values.
+# The file is read in fixed-size blocks by Arrow's streaming CSV reader and
+# every column is converted with Arrow compute kernels (strptime, substring
+# replace, cast), so no Python code runs per row. Each block is written
+# straight to the Arrow and Parquet files, so memory stays bounded by the
+# block size however long the export is.
+import argparse
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from bettersave import rollup, storage
+
+BLOCK_BYTES = 8 << 20
+
+DATE_FORMAT = "%b %d, %Y"
+DATETIME_FORMAT = "%b %d, %Y %I:%M %p"
+
+# Raw export file name prefix -> dataset it feeds
+RAW_PREFIXES = {
+    "Actual_consumption": "energy_consumption",
+    "Actual_generation": "energy_generation",
+}
+
+
+def dataset_for(path):
+    base = os.path.basename(path)
+    for prefix, name in RAW_PREFIXES.items():
+        if base.startswith(prefix):
+            return name
+    raise ValueError(f"Cannot tell which dataset {base} belongs to; pass --dataset")
+
+
+def parse_dates(values):
+    # All rows of an export share one format, so pick it from the first value.
+    first = values[0].as_py() if len(values) else ""
+    fmt = DATETIME_FORMAT if first and ":" in first else DATE_FORMAT
+    return pc.strptime(values, format=fmt, unit="ns", error_is_null=True)
+
+
+def parse_numbers(values):
+    return pc.cast(pc.replace_substring(values, ",", ""), pa.float64())
+
+
+def read_header(path):
+    with open(path, encoding="utf-8-sig") as f:
+        return f.readline().rstrip("\r\n").split(";")
+
+
+def read_raw(path, block_bytes=BLOCK_BYTES):
+    # Yields record batches in the schema of storage.to_table().
+    names = read_header(path)
+    schema = storage.to_schema(names)
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=block_bytes, column_names=names, skip_rows=1),
+        parse_options=pacsv.ParseOptions(delimiter=";"),
+        # Read every column as text: Arrow's parser does not understand the
+        # thousands separators, and "-" marks a missing value.
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            null_values=["-", ""],
+            strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        columns = [
+            parse_dates(column) if name in storage.DATE_COLUMNS else parse_numbers(column)
+            for name, column in zip(names, batch.columns)
+        ]
+        batch = pa.RecordBatch.from_arrays(columns, schema=schema)
+        yield batch.filter(pc.is_valid(batch.column("Start date")))
+
+
+def write_csv_batch(batch, path, offset):
+    # Same layout as the *_preprocessed.csv files: pandas index column,
+    # ISO dates and, for generation, a trailing "Year" column.
+    out = batch.to_pandas()
+    out.index = range(offset, offset + len(out))
+    if "Total (grid load) [MWh] Calculated resolutions" not in out.columns:
+        out["Year"] = out["Start date"].dt.year
+    for col in storage.DATE_COLUMNS:
+        out[col] = out[col].dt.strftime("%Y-%m-%d")
+    out.to_csv(path, mode="w" if offset == 0 else "a", header=offset == 0)
+
+
+def ingest(path, name=None, block_bytes=BLOCK_BYTES, csv_path=None):
+    name = name or dataset_for(path)
+    storage.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    arrow_tmp = storage.arrow_path(name).with_suffix(".arrow.tmp")
+    parquet_tmp = storage.parquet_path(name).with_suffix(".parquet.tmp")
+
+    start = time.perf_counter()
+    rows = 0
+    arrow_writer = parquet_writer = sink = None
+    try:
+        for batch in read_raw(path, block_bytes):
+            if arrow_writer is None:
+                sink = pa.OSFile(str(arrow_tmp), "wb")
+                arrow_writer = ipc.new_file(sink, batch.schema)
+                parquet_writer = pq.ParquetWriter(parquet_tmp, batch.schema)
+            arrow_writer.write_batch(batch)
+            parquet_writer.write_batch(batch)
+            if csv_path:
+                write_csv_batch(batch, csv_path, rows)
+            rows += batch.num_rows
+    finally:
+        if arrow_writer is not None:
+            arrow_writer.close()
+            sink.close()
+            parquet_writer.close()
+
+    if rows == 0:
+        raise ValueError(f"{path} contains no rows")
+    os.replace(arrow_tmp, storage.arrow_path(name))
+    os.replace(parquet_tmp, storage.parquet_path(name))
+    storage.drop_segments(name)
+
+    seconds = time.perf_counter() - start
+    return {"dataset": name, "rows": rows, "seconds": seconds, "rows_per_second": rows / seconds}
+
+
+def append(path, name=None, block_bytes=BLOCK_BYTES):
+    name = name or dataset_for(path)
+    rollups = rollup.Rollup.load(storage.dataset_version())
+    mark = storage.watermark(name)
+
+    start = time.perf_counter()
+    rows = 0
+    new_batches = []
+    for batch in read_raw(path, block_bytes):
+        rows += batch.num_rows
+        batch = storage.after(batch, mark)
+        if batch.num_rows:
+            new_batches.append(batch)
+
+    appended = 0
+    if new_batches:
+        added = storage.append(name, pa.Table.from_batches(new_batches))
+        appended = added.num_rows
+        if rollups is not None and appended:
+            rollups.apply(name, added.to_pandas())
+            rollups.save(storage.dataset_version())
+
+    seconds = time.perf_counter() - start
+    return {"dataset": name, "rows": rows, "appended": appended, "seconds": seconds,
+            "rows_per_second": rows / seconds, "watermark": storage.watermark(name)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest raw SMARD exports into the columnar datasets")
+    parser.add_argument("paths", nargs="+", help="raw SMARD CSV exports")
+    parser.add_argument("--dataset", choices=sorted(storage.DATASETS), help="target dataset (default: from file name)")
+    parser.add_argument("--block-mib", type=int, default=BLOCK_BYTES >> 20, help="size of each parsed block")
+    parser.add_argument("--csv", help="also write the result in *_preprocessed.csv layout to this path")
+    parser.add_argument("--append", action="store_true", help="only add rows newer than the dataset's watermark")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if args.append:
+            stats = append(path, args.dataset, args.block_mib << 20)
+            print(f"{path} -> {stats['dataset']}: appended {stats['appended']:,} of {stats['rows']:,} rows "
+                  f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s), "
+                  f"watermark {stats['watermark']}")
+            continue
+        stats = ingest(path, args.dataset, args.block_mib << 20, args.csv)
+        print(f"{path} -> {stats['dataset']}: {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
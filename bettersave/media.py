@@ -0,0 +1,271 @@
+# Bitrate variants of the landing-page video, and a media server for them.
+#
+# app.py used to hand static/Final_video.MP4 to st.video(), which reads the
+# whole file into the Streamlit process on every rerun that shows it and
+# sends every visitor the full-size original. Here the video is transcoded
+# offline (needs ffmpeg) into H.264 variants at a few heights and bitrates,
+# with the index at the front of the file (faststart) and a keyframe every
+# two seconds, so playback starts after the first chunk and seeks land
+# close to a keyframe. A poster frame is extracted too:
+#
+#     python -m bettersave.media transcode [static/Final_video.MP4]
+#
+# writes static/media/Final_video-720p.<hash>.mp4, ... and manifest.json.
+#
+# Streamlit's static file server sends .mp4 files as text/plain, which
+# browsers refuse to play, so the variants come from a small Tornado server:
+#
+#     python -m bettersave.media serve --port 8503
+#     BETTERSAVE_MEDIA_URL=http://127.0.0.1:8503/media streamlit run app.py
+#
+# It answers Range requests (206 Partial Content) and If-None-Match, takes
+# the ETag from the content hash in the file name (no file is read to
+# compute one), and marks the files immutable. Each response is streamed in
+# 64 KiB chunks, and after a start-up burst it is paced to a multiple of the
+# variant's bitrate, so a viewer holds one chunk of server memory and a
+# bounded share of the uplink. Beyond MAX_STREAMS concurrent responses it
+# answers 503 with Retry-After instead of slowing everyone down.
+#
+# Without BETTERSAVE_MEDIA_URL the chosen variant (or the original, if no
+# variants were built) goes through st.video() as before; without either,
+# the page says the video is unavailable instead of failing.
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+# Not storage.ROOT: the landing page imports this module, and storage would
+# bring pandas and pyarrow along (see bettersave/startup.py).
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+MEDIA_DIR = STATIC_DIR / "media"
+MANIFEST = MEDIA_DIR / "manifest.json"
+VIDEO = STATIC_DIR / "Final_video.MP4"
+POSTER_PREFIX = "app/static/media"
+MEDIA_URL = os.environ.get("BETTERSAVE_MEDIA_URL", "").rstrip("/")
+
+# (height, video bitrate in kbit/s); heights above the source's are skipped.
+LADDER = ((360, 800), (720, 2500), (1080, 5000))
+DEFAULT_HEIGHT = 720
+AUDIO_KBPS = 128
+GOP_SECONDS = 2
+
+MAX_STREAMS = 64
+# Sent unpaced at the start of a response, so playback starts at once.
+BURST_BYTES = 2 * 2**20
+# Responses are paced to this multiple of the variant's total bitrate.
+PACE_FACTOR = 2
+DEFAULT_RATE = 2**20  # bytes/s, for files not in the manifest
+
+HASHED_NAME = re.compile(r"\.([0-9a-f]{8})\.[^.]+$")
+
+
+def manifest():
+    try:
+        return json.loads(MANIFEST.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def variants(name=VIDEO.name):
+    # The built variants of static/<name> whose files are present, lowest
+    # first; empty if it was never transcoded.
+    entry = manifest().get(name, {})
+    return [variant for variant in entry.get("variants", []) if (MEDIA_DIR / variant["file"]).exists()]
+
+
+def poster_url(name=VIDEO.name):
+    poster = manifest().get(name, {}).get("poster")
+    if poster is None or not (MEDIA_DIR / poster["file"]).exists():
+        return None
+    return f"{POSTER_PREFIX}/{poster['file']}?v={poster['hash']}"
+
+
+def label(variant):
+    return f"{variant['height']}p"
+
+
+def default_index(available):
+    heights = [variant["height"] for variant in available]
+    return heights.index(DEFAULT_HEIGHT) if DEFAULT_HEIGHT in heights else 0
+
+
+def video_html(variant, name=VIDEO.name, media_url=MEDIA_URL):
+    # A <video> for the variant on the media server. preload="metadata"
+    # fetches only the index until the visitor presses play.
+    poster = poster_url(name)
+    poster_attr = f' poster="{poster}"' if poster else ""
+    return (
+        f'<video controls playsinline preload="metadata"{poster_attr} style="width: 100%;">'
+        f'<source src="{media_url}/{variant["file"]}?v={variant["hash"]}" type="video/mp4">'
+        f"</video>"
+    )
+
+
+def _require(tool):
+    path = shutil.which(tool)
+    if path is None:
+        raise SystemExit(f"{tool} not found; install ffmpeg to transcode videos")
+    return path
+
+
+def probe_height(source):
+    out = subprocess.run(
+        [_require("ffprobe"), "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=height", "-of", "csv=p=0", str(source)],
+        check=True, capture_output=True, text=True,
+    )
+    return int(out.stdout.strip())
+
+
+def _hashed(tmp, stem, extension):
+    digest = hashlib.sha1(tmp.read_bytes()).hexdigest()[:8]
+    path = tmp.with_name(f"{stem}.{digest}.{extension}")
+    os.replace(tmp, path)
+    return {"file": path.name, "hash": digest, "bytes": path.stat().st_size}
+
+
+def transcode(source=VIDEO, media_dir=MEDIA_DIR):
+    # Writes every variant and the poster of `source`; returns its manifest
+    # entry and updates the manifest.
+    ffmpeg = _require("ffmpeg")
+    if not source.exists():
+        raise SystemExit(f"{source} not found")
+    media_dir.mkdir(parents=True, exist_ok=True)
+    source_height = probe_height(source)
+    ladder = [(height, kbps) for height, kbps in LADDER if height <= source_height] or [LADDER[0]]
+
+    built = []
+    for height, kbps in ladder:
+        tmp = media_dir / f"{source.stem}-{height}p.tmp.mp4"
+        subprocess.run([
+            ffmpeg, "-y", "-v", "error", "-i", str(source),
+            "-vf", f"scale=-2:{min(height, source_height)}",
+            "-c:v", "libx264", "-preset", "slow", "-profile:v", "high", "-pix_fmt", "yuv420p",
+            "-b:v", f"{kbps}k", "-maxrate", f"{kbps * 3 // 2}k", "-bufsize", f"{kbps * 2}k",
+            "-force_key_frames", f"expr:gte(t,n_forced*{GOP_SECONDS})",
+            "-c:a", "aac", "-b:a", f"{AUDIO_KBPS}k", "-ac", "2",
+            "-movflags", "+faststart", str(tmp),
+        ], check=True)
+        variant = _hashed(tmp, f"{source.stem}-{height}p", "mp4")
+        variant.update(height=height, kbps=kbps + AUDIO_KBPS)
+        built.append(variant)
+
+    tmp = media_dir / f"{source.stem}-poster.tmp.jpg"
+    subprocess.run([
+        ffmpeg, "-y", "-v", "error", "-ss", "1", "-i", str(source),
+        "-frames:v", "1", "-vf", f"scale=-2:{min(DEFAULT_HEIGHT, source_height)}", "-q:v", "4", str(tmp),
+    ], check=True)
+    entry = {"source_bytes": source.stat().st_size, "poster": _hashed(tmp, f"{source.stem}-poster", "jpg"), "variants": built}
+
+    current = manifest()
+    old = current.get(source.name, {})
+    current[source.name] = entry
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(current, indent=2) + "\n")
+    os.replace(tmp, MANIFEST)
+    # Files of the previous build are no longer referenced.
+    keep = {item["file"] for item in [entry["poster"], *entry["variants"]]}
+    for item in [old.get("poster"), *old.get("variants", [])]:
+        if item and item["file"] not in keep:
+            (media_dir / item["file"]).unlink(missing_ok=True)
+    return entry
+
+
+def make_app(media_dir=MEDIA_DIR, max_streams=MAX_STREAMS):
+    import tornado.web
+
+    rates = {
+        variant["file"]: variant["kbps"] * 1000 // 8
+        for entry in manifest().values() for variant in entry.get("variants", [])
+    }
+
+    class MediaHandler(tornado.web.StaticFileHandler):
+        streams = 0
+        counted = False
+
+        def prepare(self):
+            if MediaHandler.streams >= max_streams:
+                self.set_status(503)
+                self.set_header("Retry-After", "5")
+                self.finish()
+                return
+            MediaHandler.streams += 1
+            self.counted = True
+            self.started = time.monotonic()
+            self.sent = 0
+
+        def on_finish(self):
+            self._release()
+
+        def on_connection_close(self):
+            self._release()
+
+        def _release(self):
+            if self.counted:
+                self.counted = False
+                MediaHandler.streams -= 1
+
+        @classmethod
+        def get_content_version(cls, abs_path):
+            # Hashed names carry their version; only other files are read.
+            match = HASHED_NAME.search(abs_path)
+            return match.group(1) if match else super().get_content_version(abs_path)
+
+        def set_extra_headers(self, path):
+            if HASHED_NAME.search(path):
+                self.set_header("Cache-Control", "public, max-age=31536000, immutable")
+            self.set_header("Accept-Ranges", "bytes")
+
+        def write(self, chunk):
+            self.sent += len(chunk)
+            return super().write(chunk)
+
+        def flush(self, include_footers=False):
+            # StaticFileHandler awaits this after every chunk; finish() calls
+            # it too and must not be held back, hence a plain Future.
+            flushed = super().flush(include_footers)
+            if include_footers or self.sent <= BURST_BYTES:
+                return flushed
+            rate = rates.get(os.path.basename(self.absolute_path), DEFAULT_RATE) * PACE_FACTOR
+            ahead = (self.sent - BURST_BYTES) / rate - (time.monotonic() - self.started)
+            return asyncio.ensure_future(self._paced(flushed, ahead)) if ahead > 0 else flushed
+
+        async def _paced(self, flushed, delay):
+            await flushed
+            await asyncio.sleep(delay)
+
+    return tornado.web.Application([(r"/media/(.*)", MediaHandler, {"path": str(media_dir)})])
+
+
+def serve(port, media_dir=MEDIA_DIR):
+    import tornado.ioloop
+
+    make_app(media_dir).listen(port)
+    print(f"serving {media_dir.relative_to(STATIC_DIR.parent)} at http://127.0.0.1:{port}/media/")
+    tornado.ioloop.IOLoop.current().start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcode and serve the landing-page video")
+    commands = parser.add_subparsers(dest="command", required=True)
+    transcode_parser = commands.add_parser("transcode", help="build the bitrate variants and poster")
+    transcode_parser.add_argument("source", nargs="?", default=str(VIDEO))
+    serve_parser = commands.add_parser("serve", help="serve static/media/ with range requests")
+    serve_parser.add_argument("--port", type=int, default=8503)
+    args = parser.parse_args()
+
+    if args.command == "transcode":
+        entry = transcode(Path(args.source))
+        for variant in entry["variants"]:
+            print(f"{label(variant)}: {variant['file']} ({variant['bytes'] / 2**20:.1f} MiB)")
+    else:
+        serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# Year/month-partitioned Parquet storage for high-resolution data.
+#
+# SMARD also publishes hourly and quarter-hour exports, 24 and 96 times the
+# rows of the daily ones. Those are not loaded whole: they are written as a
+# hive-partitioned Parquet dataset,
+#
+#     data/partitioned/<resolution>/<dataset>/year=2017/month=3/part-0.parquet
+#
+# and read through pyarrow.dataset with the year range as a filter on the
+# partition keys, so only the files of the selected years are opened, and
+# only the requested columns are decoded from them. LazyPartitions keeps
+# the years already read in a memory-bounded LRU, so widening the year
+# range reads only the years that were not loaded yet.
+#
+#     python -m bettersave.partitions Actual_consumption_201501010000_202001010000_Quarterhour.csv
+import argparse
+import os
+import shutil
+import threading
+
+import cachetools
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from bettersave import ingest, storage
+
+PARTITION_DIR = storage.DATA_DIR / "partitioned"
+PARTITIONING = ds.partitioning(pa.schema([("year", pa.int16()), ("month", pa.int8())]), flavor="hive")
+
+# SMARD export file name suffix -> resolution directory
+RESOLUTIONS = {"Quarterhour": "quarterhour", "Hour": "hour", "Day": "day"}
+
+# Bytes of decoded partitions LazyPartitions keeps per dataset
+CACHE_BYTES = 256 * 2**20
+
+
+def partition_path(name, resolution, root=PARTITION_DIR):
+    return root / resolution / name
+
+
+def resolution_for(path):
+    suffix = os.path.splitext(os.path.basename(path))[0].rsplit("_", 1)[-1]
+    if suffix not in RESOLUTIONS:
+        raise ValueError(f"Cannot tell the resolution of {os.path.basename(path)}; pass --resolution")
+    return RESOLUTIONS[suffix]
+
+
+def with_partition_keys(batch):
+    start = batch.column("Start date")
+    return batch.append_column("year", pc.year(start).cast(pa.int16())) \
+        .append_column("month", pc.month(start).cast(pa.int8()))
+
+
+def write(name, resolution, batches, schema, root=PARTITION_DIR):
+    # Replaces the partitioned dataset with the record batches (in the
+    # schema of storage.to_table). Written next to the old copy and swapped
+    # in, so readers never see a half-written dataset.
+    path = partition_path(name, resolution, root)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    keyed_schema = schema.append(pa.field("year", pa.int16())).append(pa.field("month", pa.int8()))
+    ds.write_dataset(
+        (with_partition_keys(batch) for batch in batches),
+        tmp,
+        schema=keyed_schema,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=1 << 17,
+    )
+    old = path.with_name(path.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def ingest_export(path, name=None, resolution=None, block_bytes=ingest.BLOCK_BYTES, root=PARTITION_DIR):
+    # Streams a raw SMARD export into its partitioned dataset.
+    name = name or ingest.dataset_for(path)
+    resolution = resolution or resolution_for(path)
+    schema = storage.to_schema(ingest.read_header(path))
+    write(name, resolution, ingest.read_raw(path, block_bytes), schema, root)
+    return name, resolution
+
+
+def available(name, resolution, root=PARTITION_DIR):
+    return partition_path(name, resolution, root).is_dir()
+
+
+def open_dataset(name, resolution, root=PARTITION_DIR):
+    return ds.dataset(partition_path(name, resolution, root), format="parquet", partitioning=PARTITIONING)
+
+
+def years(name, resolution, root=PARTITION_DIR):
+    # From the directory names alone; no file is opened.
+    return sorted(
+        int(entry.name.split("=", 1)[1])
+        for entry in partition_path(name, resolution, root).glob("year=*")
+    )
+
+
+def read(name, resolution, first_year, last_year, columns=None, root=PARTITION_DIR):
+    # Rows of the years first_year..last_year. The filter is on partition
+    # keys, so the other years' files are never opened.
+    dataset = open_dataset(name, resolution, root)
+    year = ds.field("year")
+    return dataset.to_table(columns=columns, filter=(year >= first_year) & (year <= last_year))
+
+
+class LazyPartitions:
+    def __init__(self, name, resolution, root=PARTITION_DIR, max_bytes=CACHE_BYTES):
+        self.name = name
+        self.resolution = resolution
+        self.root = root
+        self.lock = threading.Lock()
+        self.tables = cachetools.LRUCache(maxsize=max_bytes, getsizeof=lambda table: max(table.nbytes, 1))
+        self.reads = 0
+
+    def year(self, year, columns):
+        key = (year, tuple(columns))
+        with self.lock:
+            table = self.tables.get(key)
+        if table is None:
+            # Months come back in file order (month=10 before month=2).
+            table = read(self.name, self.resolution, year, year, list(columns), self.root).sort_by("Start date")
+            with self.lock:
+                self.reads += 1
+                try:
+                    self.tables[key] = table
+                except ValueError:
+                    pass
+        return table
+
+    def load(self, first_year, last_year, columns):
+        # One table for the year range, in date order, with only `columns`
+        # (which must include "Start date").
+        tables = [self.year(year, columns) for year in range(first_year, last_year + 1)]
+        return pa.concat_tables(tables) if tables else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write raw SMARD exports as year/month-partitioned Parquet")
+    parser.add_argument("paths", nargs="+", help="raw SMARD CSV exports")
+    parser.add_argument("--dataset", choices=sorted(storage.DATASETS), help="target dataset (default: from file name)")
+    parser.add_argument("--resolution", choices=sorted(RESOLUTIONS.values()), help="default: from file name")
+    parser.add_argument("--block-mib", type=int, default=ingest.BLOCK_BYTES >> 20, help="size of each parsed block")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        name, resolution = ingest_export(path, args.dataset, args.resolution, args.block_mib << 20)
+        print(f"{path} -> {partition_path(name, resolution).relative_to(storage.ROOT)} "
+              f"(years {', '.join(map(str, years(name, resolution)))})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# HTTP client for the forecasting API's /predict endpoint.
+#
+# One client is shared by every session of a server process. It keeps a
+# pooled keep-alive session, bounds every call with connect/read timeouts,
+# retries transient failures with exponential backoff, and coalesces
+# identical concurrent requests so N sessions asking for the same horizon at
+# the same time cause a single upstream call.
+#
+# Set BETTERSAVE_API_URL to point the app at another backend, e.g. the local
+# stub in bettersave/stub_server.py.
+import os
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from bettersave import tracing
+
+DEFAULT_API_URL = "https://bettersave-296473938693.europe-west10.run.app/predict"
+API_URL = os.environ.get("BETTERSAVE_API_URL", DEFAULT_API_URL)
+
+# First forecast day when the response carries no "Date" column: the day
+# after the training data ends.
+FORECAST_START = "2020-01-01"
+
+# (connect, read) seconds. Reads allow for a Cloud Run cold start.
+TIMEOUT = (3.05, 30)
+RETRIES = 2
+BACKOFF = 0.5
+POOL_SIZE = 16
+
+
+def parse_prediction(payload):
+    # /predict returns {"forecast": [...], "confidence_interval":
+    # {"lower Residual load": [...], "upper Residual load": [...]}} and
+    # optionally "Date" and "model_version".
+    data = dict(payload)
+    if "confidence_interval" in data:
+        data["lower"] = data["confidence_interval"]["lower Residual load"]
+        data["upper"] = data["confidence_interval"]["upper Residual load"]
+        data.pop("confidence_interval", None)
+
+    model_version = data.pop("model_version", None)
+    df = pd.DataFrame(data)
+    df.attrs["model_version"] = model_version
+
+    if "Date" not in df.columns:
+        df["Date"] = pd.date_range(start=FORECAST_START, periods=len(df), freq="D")
+
+    return df
+
+
+class PredictionClient:
+    def __init__(self, url=API_URL, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF, pool_size=POOL_SIZE):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods={"GET"},
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.upstream_calls = 0
+
+    def get_json(self, steps):
+        with self.lock:
+            self.upstream_calls += 1
+        with tracing.span("predict:http"):
+            response = self.session.get(self.url, params={"steps": steps}, timeout=self.timeout)
+            response.raise_for_status()
+        with tracing.span("predict:json"):
+            return response.json()
+
+    def predict(self, steps):
+        # Single flight: the first caller for a horizon makes the request,
+        # callers arriving while it is in flight wait for its result.
+        with self.lock:
+            future = self.inflight.get(steps)
+            leader = future is None
+            if leader:
+                future = self.inflight[steps] = Future()
+        if not leader:
+            return future.result().copy()
+
+        try:
+            payload = self.get_json(steps)
+            with tracing.span("predict:parse"):
+                result = parse_prediction(payload)
+            future.set_result(result)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[steps]
+        return result.copy()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,121 @@
+# Pre-aggregated totals of the energy datasets by year, month and ISO week.
+#
+# The Dashboard used to group the full daily frames on every rerun; it now
+# builds a Rollup once per dataset version and answers KPIs, trends and the
+# source breakdown for any year range from these small tables. The tables
+# are persisted under data/rollup/ tagged with the dataset version they
+# describe, and append-only ingestion updates just the periods touched by the
+# new rows (see Rollup.apply). cached() keeps the built Rollup in the disk
+# cache shared by replicas; the Dashboard and the start-up warm-up
+# (bettersave/startup.py) both read it from there.
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from bettersave import datasets, storage
+
+ROLLUP_DIR = storage.DATA_DIR / "rollup"
+
+GRAINS = ("year", "month", "week")
+
+# Index levels of each grain's table. The first level is always a year
+# (the ISO year for weeks), so table.loc[first_year:last_year] works on all
+# of them.
+INDEX_NAMES = {
+    "year": ["Year"],
+    "month": ["Year", "Month"],
+    "week": ["Year", "Week"],
+}
+
+
+def period_keys(dates, grain):
+    if grain == "year":
+        return [dates.dt.year.rename("Year")]
+    if grain == "month":
+        return [dates.dt.year.rename("Year"), dates.dt.month.rename("Month")]
+    iso = dates.dt.isocalendar()
+    return [iso["year"].astype("int32").rename("Year"), iso["week"].astype("int32").rename("Week")]
+
+
+def aggregate(df, grain):
+    # Sum every measure column of a daily frame into one row per period.
+    keys = period_keys(df["Start date"], grain)
+    values = df.drop(columns=storage.DATE_COLUMNS + storage.DERIVED_COLUMNS, errors="ignore")
+    return values.groupby(keys).sum()
+
+
+class Rollup:
+    def __init__(self, tables):
+        # (dataset name, grain) -> aggregated DataFrame
+        self.tables = tables
+
+    @classmethod
+    def build(cls, frames):
+        # frames: dataset name -> daily DataFrame as returned by datasets.frame
+        return cls({
+            (name, grain): aggregate(df, grain)
+            for name, df in frames.items()
+            for grain in GRAINS
+        })
+
+    def table(self, dataset, grain="year", first_year=None, last_year=None):
+        table = self.tables[(dataset, grain)]
+        if first_year is None and last_year is None:
+            return table
+        return table.loc[first_year:last_year]
+
+    def years(self, dataset):
+        return self.tables[(dataset, "year")].index
+
+    def apply(self, dataset, new_rows):
+        # Fold freshly appended daily rows into the existing tables: periods
+        # that already exist are incremented in place, new periods are added.
+        for grain in GRAINS:
+            table = self.tables[(dataset, grain)]
+            delta = aggregate(new_rows, grain)[table.columns]
+            existing = delta.index.intersection(table.index)
+            table.loc[existing] += delta.loc[existing]
+            added = delta.index.difference(table.index)
+            if len(added):
+                table = pd.concat([table, delta.loc[added]]).sort_index()
+            self.tables[(dataset, grain)] = table
+
+    def save(self, version):
+        ROLLUP_DIR.mkdir(parents=True, exist_ok=True)
+        for (dataset, grain), table in self.tables.items():
+            arrow = pa.Table.from_pandas(table.reset_index(), preserve_index=False)
+            arrow = arrow.replace_schema_metadata({"dataset_version": version})
+            path = ROLLUP_DIR / f"{dataset}.{grain}.arrow"
+            tmp = path.with_name(path.name + ".tmp")
+            with pa.OSFile(str(tmp), "wb") as sink, ipc.new_file(sink, arrow.schema) as writer:
+                writer.write_table(arrow)
+            tmp.replace(path)
+
+    @classmethod
+    def load(cls, version):
+        # Returns None unless every table was saved for `version`.
+        tables = {}
+        for dataset in storage.DATASETS:
+            for grain in GRAINS:
+                path = ROLLUP_DIR / f"{dataset}.{grain}.arrow"
+                if not path.exists():
+                    return None
+                arrow = ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+                if (arrow.schema.metadata or {}).get(b"dataset_version") != version.encode():
+                    return None
+                tables[(dataset, grain)] = arrow.to_pandas().set_index(INDEX_NAMES[grain])
+        return cls(tables)
+
+
+def load_or_build(version):
+    # The Rollup saved for `version`, built from the shared datasets and
+    # saved first if there is none.
+    rollups = Rollup.load(version)
+    if rollups is None:
+        rollups = Rollup.build({name: datasets.frame(name, version) for name in storage.DATASETS})
+        rollups.save(version)
+    return rollups
+
+
+def cached(version, disk_cache):
+    return disk_cache.get_or_compute("rollup", version, lambda: load_or_build(version))
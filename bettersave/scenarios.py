@@ -0,0 +1,85 @@
+# EV-fleet and household scenarios evaluated against a surplus series.
+#
+# Each scenario table is crossed with the surplus series in one broadcast:
+# the result array has one axis per input (surplus period, vehicle model,
+# charging loss, charge depth; or surplus period, household profile, months
+# of surplus), and the distribution over the surplus periods is summarised
+# per scenario with quantiles. Hundreds of scenarios cost a few array
+# operations, so the Prediction page can show sweeps without slowing reruns.
+import numpy as np
+import pandas as pd
+
+VEHICLES = pd.DataFrame([
+    ("Audi e-tron 55 quattro", 95.0),
+    ("Tesla Model 3 Long Range", 78.0),
+    ("Tesla Model Y", 75.0),
+    ("VW ID.3 Pro", 58.0),
+    ("VW ID.4 Pro", 77.0),
+    ("Hyundai Kona Electric", 64.0),
+    ("Renault Zoe R135", 52.0),
+    ("BMW i4 eDrive40", 84.0),
+    ("Mercedes EQS 450+", 108.0),
+    ("Fiat 500e", 42.0),
+], columns=["model", "battery_kwh"])
+
+# Share of the energy drawn from the grid lost while charging
+CHARGING_LOSSES = [0.05, 0.10, 0.15, 0.20]
+# Share of the battery filled per charge (1.0 = empty to full)
+CHARGE_DEPTHS = [1.0, 0.6]
+
+# Annual electricity use of German households by size, MWh
+HOUSEHOLDS = pd.DataFrame([
+    ("1 person", 2.0),
+    ("2 persons", 3.0),
+    ("3 persons", 3.5),
+    ("4 persons", 4.3),
+    ("5+ persons", 5.0),
+    ("4 persons, heat pump", 9.0),
+], columns=["profile", "annual_mwh"])
+
+QUANTILES = [0.1, 0.5, 0.9]
+
+
+def _summarise(values, axis_frames):
+    # values: (periods, *scenario axes) -> long DataFrame with one row per
+    # scenario and its mean and quantiles over the periods.
+    stats = np.concatenate([
+        values.mean(axis=0)[None],
+        np.quantile(values, QUANTILES, axis=0),
+    ]).reshape(1 + len(QUANTILES), -1).T
+    index = pd.MultiIndex.from_product([frame.index for frame in axis_frames]).to_frame(index=False)
+    parts = [frame.iloc[index[i]].reset_index(drop=True) for i, frame in enumerate(axis_frames)]
+    columns = ["mean"] + [f"p{int(q * 100)}" for q in QUANTILES]
+    return pd.concat(parts + [pd.DataFrame(stats, columns=columns)], axis=1)
+
+
+def ev_scenarios(surplus_mwh, vehicles=VEHICLES, charging_losses=CHARGING_LOSSES, charge_depths=CHARGE_DEPTHS):
+    # Number of charges each surplus period pays for, per vehicle model,
+    # charging loss and charge depth.
+    surplus_kwh = np.asarray(surplus_mwh, dtype="float64")[:, None, None, None] * 1000
+    battery = vehicles["battery_kwh"].to_numpy()[None, :, None, None]
+    loss = np.asarray(charging_losses, dtype="float64")[None, None, :, None]
+    depth = np.asarray(charge_depths, dtype="float64")[None, None, None, :]
+    charges = np.floor(surplus_kwh * (1 - loss) / (battery * depth))
+    return _summarise(charges, [
+        vehicles.reset_index(drop=True),
+        pd.DataFrame({"charging_loss": charging_losses}),
+        pd.DataFrame({"charge_depth": charge_depths}),
+    ])
+
+
+def household_scenarios(surplus_mwh, households=HOUSEHOLDS, months=range(1, 13)):
+    # Households whose annual use `months` consecutive surplus periods
+    # (e.g. months) would cover, per household profile. Windows are taken
+    # over the series, so each months value has its own distribution.
+    surplus_mwh = np.asarray(surplus_mwh, dtype="float64")
+    months = np.asarray(list(months))
+    # Rolling sums of every window length via one cumulative sum.
+    csum = np.concatenate([[0.0], np.cumsum(surplus_mwh)])
+    starts = np.arange(len(surplus_mwh) - months.max() + 1)
+    windows = csum[starts[:, None] + months[None, :]] - csum[starts[:, None]]
+    homes = np.floor(windows[:, None, :] / households["annual_mwh"].to_numpy()[None, :, None])
+    return _summarise(homes, [
+        households.reset_index(drop=True),
+        pd.DataFrame({"months": months}),
+    ])
@@ -0,0 +1,268 @@
+# Cold start: what the first visitor after a deploy or an autoscale waits for.
+#
+# A fresh server process has imported Streamlit and little else. The first
+# run of a page used to import pandas, pyarrow, requests and Plotly (about
+# 0.8 s together), map the datasets, load the rollups, build its first
+# Plotly figures (Plotly loads its validators on first use) and, on the
+# Prediction page, wait for the forecasting service. Three parts keep that
+# off the first visitor's clock:
+#
+# - Heavy modules are imported where they are used. The landing page needs
+#   none of pandas, pyarrow, requests or Pillow, and the Prediction page
+#   imports Plotly and the exporters only once it has a forecast to show.
+# - warm_up() starts a background thread, once per process, that imports
+#   every module the pages import, builds a throwaway figure of each kind
+#   the pages draw, loads the datasets (bettersave/datasets.py), prunes the
+#   disk cache and puts the rollups into it for the Dashboard, and fetches
+#   the popular forecast horizons (bettersave/forecast_service.py).
+# - import_times() measures, in a fresh interpreter, what each page's
+#   top-level imports cost on top of Streamlit, module by module.
+#
+# Starting the server with
+#
+#     python -m bettersave.startup run [streamlit run options]
+#
+# begins the warm-up when the process boots, before anyone connects; under
+# a plain `streamlit run app.py` the landing page's first run starts it.
+# BETTERSAVE_WARM_UP=0 turns it off.
+#
+#     python -m bettersave.startup imports [app.py pages/Dashboard.py ...]
+#     python -m bettersave.startup warm
+#
+# print the import profile of the pages, and run the warm-up in the
+# foreground with the time of each step.
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = [ROOT / "app.py", *sorted((ROOT / "pages").glob("*.py"))]
+ENABLED = os.environ.get("BETTERSAVE_WARM_UP", "1") not in ("", "0")
+
+# Already loaded by the time any page runs.
+BASELINE = ("streamlit",)
+MARK = "-- page imports --"
+
+_lock = threading.Lock()
+_thread = None
+# step -> (seconds, error or None), filled in as the warm-up goes
+timings = {}
+
+
+def page_modules(script, nested=True):
+    # Modules a page script imports: anywhere in it, or only at its top
+    # level (what its first run waits for). "from x import y" lists both x
+    # and x.y, since y may be a submodule.
+    tree = ast.parse(Path(script).read_text(encoding="utf-8"))
+    modules = []
+    for node in ast.walk(tree) if nested else tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        modules += [name for name in names if name not in modules]
+    return modules
+
+
+def load(name):
+    # Imports module `name`; False when it names an attribute instead (e.g.
+    # datetime.datetime, from "from datetime import datetime"). __import__,
+    # unlike importlib.import_module, is timed by -X importtime.
+    parent = name.rpartition(".")[0]
+    if parent and not (load(parent) and hasattr(sys.modules[parent], "__path__")):
+        return False
+    try:
+        __import__(name)
+        return True
+    except ModuleNotFoundError as exc:
+        if exc.name != name or not parent:
+            raise
+        return False
+
+
+def import_times(script, baseline=BASELINE):
+    # [(module, depth, self ms, cumulative ms)] of the top-level imports of
+    # `script` in a fresh interpreter that has imported `baseline`, in the
+    # order Python finished them (-X importtime).
+    code = (
+        "import sys\n"
+        "from bettersave.startup import load\n"
+        f"for name in {list(baseline)!r}: load(name)\n"
+        f"sys.stderr.write({MARK!r} + '\\n')\n"
+        f"for name in {page_modules(script, nested=False)!r}: load(name)\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    lines = out.stderr.splitlines()
+    rows = []
+    for line in lines[lines.index(MARK) + 1:]:
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+
+def _modules():
+    for script in SCRIPTS:
+        for name in page_modules(script):
+            load(name)
+
+
+def _plotly():
+    # One small figure of each kind the pages draw, serialized the way
+    # st.plotly_chart does, so Plotly's validators and templates are loaded.
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    frame = pd.DataFrame({"x": [0, 1], "y": [0.0, 1.0], "kind": ["a", "b"]})
+    figures = [
+        px.line(frame, x="x", y="y", color="kind", markers=True, template="plotly_white"),
+        px.pie(names=frame["kind"], values=frame["y"], template="plotly_white"),
+        px.area(x=frame["x"], y=frame["y"], template="plotly_white"),
+        go.Figure(go.Bar(x=frame["x"], y=frame["y"])),
+        go.Figure(go.Heatmap(z=[[0.0, 1.0]])),
+        go.Figure(go.Scatter(x=frame["x"], y=frame["y"], mode="lines", fill="tonexty", line=dict(width=0))),
+    ]
+    for figure in figures:
+        figure.update_layout(title="warm-up", xaxis_title="x", yaxis_title="y")
+        figure.to_json()
+
+
+def _assets():
+    from bettersave import assets
+
+    assets.manifest()
+
+
+def _datasets():
+    from bettersave import datasets
+
+    datasets.shared()
+
+
+def _disk_cache():
+    from bettersave.disk_cache import DiskCache
+
+    DiskCache().prune()
+
+
+def _rollups():
+    from bettersave import rollup, storage
+    from bettersave.disk_cache import DiskCache
+
+    rollup.cached(storage.dataset_version(), DiskCache())
+
+
+def _forecast_requests():
+    # Sent first, so the forecasting service answers while the rest warms.
+    from bettersave import forecast_service
+
+    forecast_service.shared().warm_up()
+
+
+def _forecasts():
+    from bettersave import forecast_service
+
+    warming = forecast_service.shared().warm_up()
+    if warming is not None:
+        warming.result()
+
+
+STEPS = [
+    ("forecast requests", _forecast_requests),
+    ("modules", _modules),
+    ("plotly", _plotly),
+    ("assets", _assets),
+    ("datasets", _datasets),
+    ("disk cache", _disk_cache),
+    ("rollups", _rollups),
+    ("forecasts", _forecasts),
+]
+
+
+def run_steps(verbose=False):
+    # Runs every step in order; a failed step is recorded and skipped, the
+    # page that needs it then does the work (and reports the error) itself.
+    for name, step in STEPS:
+        start = time.perf_counter()
+        error = None
+        try:
+            step()
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        timings[name] = (time.perf_counter() - start, error)
+    if verbose:
+        print(f"warm-up: {report()}", file=sys.stderr, flush=True)
+    return dict(timings)
+
+
+def report():
+    parts = [f"{name} {seconds:.2f} s" + (f" ({error})" if error else "") for name, (seconds, error) in timings.items()]
+    return ", ".join(parts) + f"; {sum(seconds for seconds, _ in timings.values()):.2f} s in total"
+
+
+def warm_up(verbose=False):
+    # Starts the warm-up on a daemon thread, once per process; returns the
+    # thread (None when BETTERSAVE_WARM_UP turns it off).
+    global _thread
+    with _lock:
+        if _thread is None and ENABLED:
+            _thread = threading.Thread(target=run_steps, args=(verbose,), name="bettersave-warm-up", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def print_import_times(scripts, top):
+    for script in scripts:
+        rows = import_times(script)
+        direct = [row for row in rows if row[1] == 0]
+        total = sum(cumulative for _, _, _, cumulative in direct)
+        print(f"{Path(script).resolve().relative_to(ROOT)}: {total:.0f} ms of imports on top of {', '.join(BASELINE)}")
+        for name, _, _, cumulative in sorted(direct, key=lambda row: -row[3]):
+            print(f"  {cumulative:8.1f} ms  {name}")
+        if top:
+            print("  heaviest modules by own time:")
+            for name, _, own, _ in sorted(rows, key=lambda row: -row[2])[:top]:
+                print(f"  {own:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the pages, and the start-up warm-up")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports_parser = commands.add_parser("imports", help="per-module import times of each page's top-level imports")
+    imports_parser.add_argument("scripts", nargs="*", default=[str(script) for script in SCRIPTS])
+    imports_parser.add_argument("--top", type=int, default=5, help="also list the N modules with the most own time")
+    commands.add_parser("warm", help="run the warm-up in the foreground and time its steps")
+    commands.add_parser("run", help="warm up in the background and start the Streamlit server; "
+                                    "other options are passed on to `streamlit run app.py`")
+    args, options = parser.parse_known_args()
+    if options and args.command != "run":
+        parser.error(f"unrecognized arguments: {' '.join(options)}")
+
+    if args.command == "imports":
+        print_import_times(args.scripts, args.top)
+    elif args.command == "warm":
+        run_steps(verbose=True)
+    else:
+        from streamlit.web import cli
+
+        warm_up(verbose=True)
+        sys.argv = ["streamlit", "run", str(ROOT / "app.py"), *options]
+        cli.main(prog_name="streamlit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# Columnar storage for the preprocessed energy datasets.
+#
+# The preprocessed CSVs are converted once into typed Arrow IPC files (read
+# back through a memory map, so loading does no text parsing) and Parquet
+# files (compressed copies for distribution). Rebuild them with:
+#
+#     python -m bettersave.storage
+#
+# New days are added with append(), which writes only the new rows as a
+# delta segment next to the base file and advances the dataset's watermark
+# (the last ingested "End date"). Readers concatenate the base file and its
+# segments; compact() folds the segments back into the base file.
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+
+# Dataset name -> preprocessed CSV it is converted from
+DATASETS = {
+    "energy_generation": ROOT / "energy_generation_preprocessed.csv",
+    "energy_consumption": ROOT / "energy_consumption_preprocessed.csv",
+}
+
+WATERMARKS = DATA_DIR / "watermarks.json"
+
+# Delta segments beyond this many trigger a compaction on append()
+MAX_SEGMENTS = 32
+
+DATE_COLUMNS = ["Start date", "End date"]
+# Columns of the CSVs that are not data: the pandas index written by
+# to_csv() and the derived "Year" column, which bettersave/datasets.py
+# recomputes.
+DROP_COLUMNS = ["Unnamed: 0", "Year"]
+# Calendar columns bettersave/datasets.py adds to the shared frames. Like
+# the dates, they are not measures and are never summed.
+DERIVED_COLUMNS = ["Year", "Month", "Week"]
+
+
+def arrow_path(name):
+    return DATA_DIR / f"{name}.arrow"
+
+
+def parquet_path(name):
+    return DATA_DIR / f"{name}.parquet"
+
+
+def segment_paths(name):
+    # Base file first, then the delta segments in append order.
+    return [arrow_path(name)] + sorted(DATA_DIR.glob(f"{name}-*.arrow"))
+
+
+def read_csv(name):
+    df = pd.read_csv(DATASETS[name])
+    df = df.drop(columns=DROP_COLUMNS, errors="ignore")
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+    value_cols = df.columns.difference(DATE_COLUMNS)
+    df[value_cols] = df[value_cols].apply(pd.to_numeric, errors="coerce").astype("float64")
+    return df
+
+
+def to_schema(columns):
+    # Dates are stored as timestamp[ns] so they map onto datetime64[ns]
+    # without a conversion when read back into pandas.
+    return pa.schema([
+        pa.field(col, pa.timestamp("ns") if col in DATE_COLUMNS else pa.float64())
+        for col in columns
+    ])
+
+
+def to_table(df):
+    return pa.Table.from_pandas(df, schema=to_schema(df.columns), preserve_index=False)
+
+
+def _replace_atomically(path, write):
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_arrow(path, table):
+    with pa.OSFile(str(path), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def write_table(name, table):
+    # Replace the whole dataset (base file, Parquet copy, no segments).
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    _replace_atomically(arrow_path(name), lambda path: _write_arrow(path, table))
+    _replace_atomically(parquet_path(name), lambda path: pq.write_table(table, path))
+    drop_segments(name)
+
+
+def drop_segments(name):
+    # After the base file has been rewritten with the full history.
+    for path in segment_paths(name)[1:]:
+        path.unlink()
+    set_watermark(name, read_table(name))
+
+
+def convert(name):
+    table = to_table(read_csv(name))
+    write_table(name, table)
+    return table
+
+
+def read_table(name):
+    if not arrow_path(name).exists():
+        convert(name)
+    # The table's buffers point straight into the mapped files.
+    return pa.concat_tables(
+        ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        for path in segment_paths(name)
+    )
+
+
+def read_watermarks():
+    try:
+        return json.loads(WATERMARKS.read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def set_watermark(name, table):
+    marks = read_watermarks()
+    if table.num_rows:
+        marks[name] = pc.max(table["End date"]).as_py().isoformat()
+    text = json.dumps(marks, indent=2, sort_keys=True)
+    _replace_atomically(WATERMARKS, lambda path: path.write_text(text))
+
+
+def watermark(name):
+    # Last ingested "End date" of a dataset, as a pandas Timestamp.
+    marks = read_watermarks()
+    if name not in marks:
+        set_watermark(name, read_table(name))
+        marks = read_watermarks()
+    return pd.Timestamp(marks[name]) if name in marks else None
+
+
+def after(data, mark):
+    # Rows of a Table/RecordBatch that end after the watermark `mark`.
+    if mark is None:
+        return data
+    return data.filter(pc.greater(data["End date"], pa.scalar(mark.to_pydatetime(), pa.timestamp("ns"))))
+
+
+def table_schema(name):
+    if not arrow_path(name).exists():
+        convert(name)
+    return ipc.open_file(pa.memory_map(str(arrow_path(name)), "r")).schema
+
+
+def append(name, table):
+    # Append the rows of `table` that end after the watermark, dropping
+    # repeated "Start date"s within the batch (last one wins). Only the new
+    # rows are written, so the cost is independent of the history length.
+    # Returns the rows actually appended.
+    schema = table_schema(name)
+    table = table.select(schema.names).cast(schema)
+    table = after(table, watermark(name))
+    df = table.to_pandas().drop_duplicates("Start date", keep="last").sort_values("Start date")
+    table = pa.Table.from_pandas(df, schema=table.schema, preserve_index=False)
+    if table.num_rows == 0:
+        return table
+
+    segments = segment_paths(name)
+    seq = int(segments[-1].stem.rsplit("-", 1)[1]) + 1 if len(segments) > 1 else 1
+    _replace_atomically(DATA_DIR / f"{name}-{seq:05d}.arrow", lambda path: _write_arrow(path, table))
+    set_watermark(name, table)
+    if len(segments) >= MAX_SEGMENTS:
+        compact(name)
+    return table
+
+
+def compact(name):
+    write_table(name, read_table(name).combine_chunks())
+
+
+_hashes = {}
+
+
+def _file_hash(path):
+    # Memoized on size and mtime, so only new or rewritten files are read.
+    stat = path.stat()
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        _hashes[key] = hashlib.sha1(path.read_bytes()).hexdigest()
+    return _hashes[key]
+
+
+def dataset_version():
+    # Content hash of the columnar files, used to key caches of anything
+    # derived from the datasets. Costs a stat() per file once the files
+    # have been hashed.
+    digest = hashlib.sha1()
+    for name in DATASETS:
+        if not arrow_path(name).exists():
+            convert(name)
+        for path in segment_paths(name):
+            digest.update(_file_hash(path).encode())
+    return digest.hexdigest()[:12]
+
+
+def load_dataset(name):
+    # split_blocks keeps each column in its own block so float and
+    # timestamp columns are handed to pandas without being copied.
+    return read_table(name).to_pandas(split_blocks=True)
+
+
+if __name__ == "__main__":
+    for dataset in DATASETS:
+        table = convert(dataset)
+        print(f"{dataset}: {table.num_rows} rows -> {arrow_path(dataset).relative_to(ROOT)}, "
+              f"{parquet_path(dataset).relative_to(ROOT)}")
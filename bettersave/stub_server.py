@@ -0,0 +1,101 @@
+# Local stand-in for the forecasting API, for offline development, latency
+# and coalescing tests.
+#
+#     python -m bettersave.stub_server --port 8502 --latency 0.5
+#     BETTERSAVE_API_URL=http://127.0.0.1:8502/predict streamlit run app.py
+#
+# GET /predict?steps=N answers in the same shape as the real endpoint after
+# an artificial delay; GET /stats reports how many predictions were served.
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+def stub_payload(steps):
+    # Residual-load-like daily values: yearly and weekly cycles around 9.5e5 MWh.
+    t = np.arange(steps)
+    forecast = 9.5e5 + 1.5e5 * np.cos(2 * np.pi * t / 365.25) - 8.0e4 * (t % 7 >= 5)
+    spread = 1.5e5 + 500.0 * t
+    return {
+        "forecast": forecast.round(2).tolist(),
+        "confidence_interval": {
+            "lower Residual load": (forecast - spread).round(2).tolist(),
+            "upper Residual load": (forecast + spread).round(2).tolist(),
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            self.send_json(200, {"predictions": self.server.predictions})
+            return
+        if url.path != "/predict":
+            self.send_json(404, {"detail": "Not Found"})
+            return
+        try:
+            steps = int(parse_qs(url.query)["steps"][0])
+        except (KeyError, ValueError):
+            self.send_json(422, {"detail": "steps must be an integer"})
+            return
+
+        with self.server.lock:
+            self.server.predictions += 1
+        time.sleep(self.server.latency)
+        self.send_json(200, stub_payload(steps))
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, verbose=False):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.predictions = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/predict"
+
+    def start(self):
+        # Serve from a daemon thread; returns self for chaining.
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub /predict server")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before answering")
+    args = parser.parse_args()
+
+    server = StubServer(args.port, args.latency, verbose=True)
+    print(f"Serving stub predictions on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
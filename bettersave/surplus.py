@@ -0,0 +1,81 @@
+# Renewable surplus computed from the generation and consumption datasets.
+#
+# A day's surplus is the generation the grid did not absorb (total
+# generation minus grid load), capped at that day's renewable generation:
+# only energy renewables could have supplied counts as surplus, and days
+# where generation falls short of load have none.
+#
+# For forecast horizons the remote and local models predict residual load
+# (load minus wind and solar), not surplus. The history gives an empirical
+# mapping from residual load to surplus (mean surplus per residual-load
+# quantile bin), which is applied to each forecast day.
+import numpy as np
+import pandas as pd
+
+from bettersave import datasets, storage
+
+SUFFIX = " [MWh] Calculated resolutions"
+RENEWABLE_SOURCES = [
+    f"{source}{SUFFIX}"
+    for source in ["Biomass", "Hydropower", "Wind offshore", "Wind onshore", "Photovoltaics"]
+]
+LOAD = f"Total (grid load){SUFFIX}"
+RESIDUAL_LOAD = f"Residual load{SUFFIX}"
+
+RESIDUAL_BINS = 20
+
+
+def daily_surplus(energy_gen, energy_cons):
+    # One row per day present in both datasets.
+    gen = energy_gen.set_index("Start date")
+    cons = energy_cons.set_index("Start date")
+    days = gen.index.intersection(cons.index)
+    gen, cons = gen.loc[days], cons.loc[days]
+
+    sources = gen.drop(columns=storage.DATE_COLUMNS + storage.DERIVED_COLUMNS, errors="ignore").to_numpy()
+    renewables = gen[RENEWABLE_SOURCES].to_numpy().sum(axis=1)
+    generation = sources.sum(axis=1)
+    load = cons[LOAD].to_numpy()
+    surplus = np.clip(generation - load, 0, renewables)
+    return pd.DataFrame({
+        "renewables": renewables,
+        "generation": generation,
+        "load": load,
+        "residual_load": cons[RESIDUAL_LOAD].to_numpy(),
+        "surplus": surplus,
+    }, index=days.rename("Date"))
+
+
+class SurplusModel:
+    def __init__(self, daily):
+        self.daily = daily
+        self.monthly = daily["surplus"].resample("MS").sum()
+        # Typical surplus of each calendar month (1-12), averaged over years.
+        self.by_calendar_month = self.monthly.groupby(self.monthly.index.month).mean()
+
+        edges = np.quantile(daily["residual_load"], np.linspace(0, 1, RESIDUAL_BINS + 1))
+        self.bin_edges = edges[1:-1]
+        bins = np.digitize(daily["residual_load"].to_numpy(), self.bin_edges)
+        self.bin_surplus = np.bincount(bins, weights=daily["surplus"].to_numpy(), minlength=RESIDUAL_BINS) / \
+            np.maximum(np.bincount(bins, minlength=RESIDUAL_BINS), 1)
+
+    @classmethod
+    def from_datasets(cls):
+        return cls(daily_surplus(datasets.frame("energy_generation"), datasets.frame("energy_consumption")))
+
+    def mean_monthly(self):
+        return float(self.monthly.mean())
+
+    def months_ahead(self, months, start):
+        # Expected surplus of the `months` calendar months starting at `start`.
+        first = pd.Timestamp(start).month - 1
+        calendar = (first + np.arange(months)) % 12 + 1
+        return float(self.by_calendar_month.reindex(calendar).fillna(0).sum())
+
+    def forecast_daily(self, residual_load):
+        # Expected daily surplus for forecast residual-load values.
+        return self.bin_surplus[np.digitize(np.asarray(residual_load, dtype="float64"), self.bin_edges)]
+
+    def forecast_total(self, forecast):
+        # Total expected surplus over a forecast frame ("forecast" column).
+        return float(self.forecast_daily(forecast["forecast"]).sum())
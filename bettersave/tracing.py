@@ -0,0 +1,178 @@
+# Named timing spans for the pages' hot paths.
+#
+#     trace = tracing.begin("Dashboard", enabled=...)
+#     with tracing.span("load_data"):
+#         ...
+#     tracing.sidebar_panel(tracing.end(trace))
+#
+# A trace covers one rerun of one page. Each span records its start offset,
+# wall time and the change in the process's resident memory; at the end of
+# the rerun the trace is written as one JSON line to the "bettersave.trace"
+# logger. Tracing is on for every rerun with BETTERSAVE_TRACE=1, or for a
+# single session through the sidebar's "Performance panel" toggle.
+#
+# When no trace is active a span is an attribute lookup and two no-op calls,
+# so the spans stay in the code permanently.
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("BETTERSAVE_TRACE", "") not in ("", "0")
+PANEL_KEY = "perf_panel"
+
+logger = logging.getLogger("bettersave.trace")
+if not logger.handlers:
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_current = contextvars.ContextVar("bettersave_trace", default=None)
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes():
+    # Current resident set size. Process-wide, so spans of concurrent
+    # sessions show up in each other's deltas; read the numbers per rerun,
+    # not per byte.
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        import resource
+        # Peak, not current, where /proc is not available (macOS: bytes).
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Trace:
+    def __init__(self, page):
+        self.page = page
+        self.spans = []
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.rss_start = rss_bytes()
+
+    def add(self, name, start, end, rss_delta):
+        with self.lock:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+                "rss_delta_kb": rss_delta // 1024,
+                "thread": threading.current_thread().name,
+            })
+
+    def adopt(self, other):
+        # Adds the spans of `other` (a detached() trace), shifted onto this
+        # trace's clock: work that ran before this rerun starts below zero.
+        offset = (other.started - self.started) * 1000
+        with other.lock:
+            spans = [{**s, "start_ms": round(s["start_ms"] + offset, 3)} for s in other.spans]
+        with self.lock:
+            self.spans.extend(spans)
+
+    def record(self):
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        rss = rss_bytes()
+        return {
+            "event": "rerun",
+            "page": self.page,
+            "timestamp": time.time(),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "rss_mb": round(rss / 2**20, 1),
+            "rss_delta_kb": (rss - self.rss_start) // 1024,
+            "spans": spans,
+        }
+
+
+class span:
+    # Context manager timing the enclosed block under `name` in the active
+    # trace, if there is one.
+    __slots__ = ("name", "trace", "start", "rss")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is not None:
+            self.rss = rss_bytes()
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            end = time.perf_counter()
+            self.trace.add(self.name, self.start, end, rss_bytes() - self.rss)
+        return False
+
+
+def begin(page, enabled=False):
+    # Starts the trace of one rerun, or clears any left over from an earlier
+    # rerun on this thread when tracing is off.
+    trace = Trace(page) if enabled or ENABLED else None
+    _current.set(trace)
+    return trace
+
+
+def end(trace):
+    # Ends the rerun's trace and logs it; returns its record (None if off).
+    _current.set(None)
+    if trace is None:
+        return None
+    record = trace.record()
+    logger.info(json.dumps(record))
+    return record
+
+
+def detached(fn, name):
+    # For work a rerun starts on a worker but a later rerun reads the result
+    # of (the Prediction page's background fetches): fn wrapped to run under
+    # a trace of its own when the calling rerun is traced. Returns (wrapper,
+    # trace or None); the rerun that reads the result adds the spans to its
+    # own trace with adopt(trace).
+    if _current.get() is None:
+        return fn, None
+    trace = Trace(name)
+
+    def run(*args, **kwargs):
+        token = _current.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run, trace
+
+
+def adopt(trace):
+    current = _current.get()
+    if current is not None and trace is not None:
+        current.adopt(trace)
+
+
+def sidebar_panel(record):
+    # The opt-in toggle and, when on, the breakdown of this rerun.
+    import streamlit as st
+
+    st.sidebar.markdown("---")
+    st.sidebar.toggle("Performance panel", key=PANEL_KEY, help="Time the stages of each rerun of this page")
+    if record is None:
+        return
+    st.sidebar.caption(
+        f"Rerun: {record['total_ms']:,.1f} ms · RSS {record['rss_mb']:,.1f} MB "
+        f"({record['rss_delta_kb']:+,} KB)"
+    )
+    if record["spans"]:
+        st.sidebar.dataframe(
+            [{"span": s["name"], "ms": s["duration_ms"], "Δ RSS (KB)": s["rss_delta_kb"]} for s in record["spans"]],
+            hide_index=True,
+            use_container_width=True,
+        )
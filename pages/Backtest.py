@@ -0,0 +1,92 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+from bettersave import backtest, storage, tracing
+
+# **🔹 Streamlit Page Config**
+st.set_page_config(page_title="BetterSave Backtest", layout="wide")
+
+# **🔹 Per-rerun Timing Spans** (BETTERSAVE_TRACE=1, or the sidebar's Performance panel)
+trace = tracing.begin("Backtest", st.session_state.get(tracing.PANEL_KEY, False))
+
+# **🔹 Rolling-Origin Backtest (process pool over cut-off dates, per dataset version and settings)**
+@st.cache_data(ttl=3600, show_spinner="Running the backtest…")
+def run_backtest(dataset_version, forecaster, max_horizon, step):
+    return backtest.run(forecaster, max_horizon, step)
+
+FORECASTER_NAMES = {"local": "Local model (harmonic regression)", "seasonal_naive": "Seasonal naive (same weekday last year)"}
+COLORS = {"local": "green", "seasonal_naive": "gray"}
+
+# **🔹 UI Setup**
+st.markdown("<h1 style='text-align: center;'>BetterSave Forecast Backtest</h1>", unsafe_allow_html=True)
+st.markdown(
+    "How accurate are residual-load forecasts? Each forecaster is refitted at every cut-off date on the days before it, "
+    "forecasts the days after it, and is scored against what actually happened. "
+    "The forecasting API always forecasts from January 2020, so only the in-process models can be backtested."
+)
+
+# **🔹 Sidebar: Backtest Settings**
+st.sidebar.header("Backtest Settings")
+forecasters = st.sidebar.multiselect("Forecasters", list(FORECASTER_NAMES), default=list(FORECASTER_NAMES), format_func=FORECASTER_NAMES.get)
+max_horizon = st.sidebar.slider("Maximum horizon (days)", 7, 365, backtest.MAX_HORIZON)
+step = st.sidebar.select_slider("Cut-off every", options=[1, 7, 14, 30], value=backtest.ORIGIN_STEP, format_func=lambda v: f"{v} day(s)")
+
+if not forecasters:
+    st.info("Select at least one forecaster.")
+    tracing.sidebar_panel(tracing.end(trace))
+    st.stop()
+
+dataset_version = storage.dataset_version()
+results = {}
+with tracing.span("run_backtest"):
+    for forecaster in forecasters:
+        results[forecaster] = run_backtest(dataset_version, forecaster, max_horizon, step)
+
+# **🔹 Summary**
+for forecaster, (by_horizon, by_origin, elapsed) in results.items():
+    st.markdown(f"#### {FORECASTER_NAMES[forecaster]}")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Next-day MAE", f"{by_horizon['mae'].iloc[0]:,.0f} MWh")
+    col2.metric(f"{by_horizon['horizon'].iloc[-1]}-day MAE", f"{by_horizon['mae'].iloc[-1]:,.0f} MWh")
+    col3.metric("MAPE (all horizons)", f"{by_origin['mape'].mean():.1%}")
+    col4.metric(f"{backtest.INTERVAL:.0%} interval coverage", f"{by_origin['coverage'].mean():.1%}")
+    st.caption(f"{len(by_origin):,} cut-offs × {max_horizon} days in {elapsed:.1f} s "
+               f"on {backtest.workers_for(len(by_origin))} process(es).")
+
+# **🔹 Error and Coverage by Horizon**
+with tracing.span("horizon:figures"):
+    fig_mae, fig_mape, fig_coverage = go.Figure(), go.Figure(), go.Figure()
+    for forecaster, (by_horizon, _, _) in results.items():
+        line = dict(color=COLORS[forecaster], width=3)
+        fig_mae.add_trace(go.Scatter(x=by_horizon["horizon"], y=by_horizon["mae"], mode="lines", name=FORECASTER_NAMES[forecaster], line=line))
+        fig_mape.add_trace(go.Scatter(x=by_horizon["horizon"], y=by_horizon["mape"] * 100, mode="lines", name=FORECASTER_NAMES[forecaster], line=line))
+        fig_coverage.add_trace(go.Scatter(x=by_horizon["horizon"], y=by_horizon["coverage"] * 100, mode="lines", name=FORECASTER_NAMES[forecaster], line=line))
+    fig_coverage.add_hline(y=backtest.INTERVAL * 100, line_dash="dash", annotation_text="nominal")
+    fig_mae.update_layout(title="Mean Absolute Error by Horizon", xaxis_title="Days ahead", yaxis_title="MWh", template="plotly_white")
+    fig_mape.update_layout(title="Mean Absolute Percentage Error by Horizon", xaxis_title="Days ahead", yaxis_title="%", template="plotly_white")
+    fig_coverage.update_layout(title="Interval Coverage by Horizon", xaxis_title="Days ahead", yaxis_title="% of actuals inside the interval", template="plotly_white")
+
+with tracing.span("horizon:plotly_chart"):
+    st.plotly_chart(fig_mae, use_container_width=True)
+    col1, col2 = st.columns(2)
+    col1.plotly_chart(fig_mape, use_container_width=True)
+    col2.plotly_chart(fig_coverage, use_container_width=True)
+
+# **🔹 Error by Cut-off Date**
+with tracing.span("origin:figure"):
+    fig_origin = go.Figure()
+    for forecaster, (_, by_origin, _) in results.items():
+        fig_origin.add_trace(go.Scatter(x=by_origin["origin"], y=by_origin["mae"], mode="lines", name=FORECASTER_NAMES[forecaster], line=dict(color=COLORS[forecaster])))
+    fig_origin.update_layout(title=f"MAE over the Next {max_horizon} Days, by Cut-off Date", xaxis_title="Cut-off date", yaxis_title="MWh", template="plotly_white")
+with tracing.span("origin:plotly_chart"):
+    st.plotly_chart(fig_origin, use_container_width=True)
+
+# **🔹 Results Table**
+st.markdown("### 📊 Accuracy at Selected Horizons")
+for forecaster, (by_horizon, _, _) in results.items():
+    st.markdown(f"**{FORECASTER_NAMES[forecaster]}**")
+    selected = by_horizon[by_horizon["horizon"].isin([1, 7, 14, 30, 60, 90, 180, 365])]
+    st.dataframe(selected.style.format({"mae": "{:,.0f}", "mape": "{:.1%}", "coverage": "{:.1%}"}), use_container_width=True, hide_index=True)
+
+# **🔹 Performance Panel** (opt-in per session; also logs the rerun as JSON when tracing)
+tracing.sidebar_panel(tracing.end(trace))
@@ -1,50 +1,232 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+
+from bettersave import datasets, downsample, exports, partitions, rollup, storage, surplus, tracing
+from bettersave.disk_cache import DiskCache
+from bettersave.figure_cache import FigureCache
+from bettersave.prefix_index import PrefixIndex
 
 # Set page configuration
 st.set_page_config(page_title="BetterSave Energy Dashboard", layout="wide")
 
-# Load Data
-@st.cache_data(ttl=3600)
+# Per-rerun timing spans (BETTERSAVE_TRACE=1, or the sidebar's Performance panel)
+trace = tracing.begin("Dashboard", st.session_state.get(tracing.PANEL_KEY, False))
+
+# Load Data (read-only views of one shared, memory-mapped copy per process;
+# see bettersave/datasets.py)
 def load_data():
-    gen_file = "energy_generation_preprocessed.csv"
-    cons_file = "energy_consumption_preprocessed.csv"
+    with tracing.span("load_data"):
+        energy_gen = datasets.frame("energy_generation")
+        energy_cons = datasets.frame("energy_consumption")
 
-    energy_gen = pd.read_csv(gen_file)
-    energy_cons = pd.read_csv(cons_file)
+    return energy_gen, energy_cons
 
-    # Convert dates
-    energy_gen["Start date"] = pd.to_datetime(energy_gen["Start date"], errors="coerce")
-    energy_cons["Start date"] = pd.to_datetime(energy_cons["Start date"], errors="coerce")
+# Disk cache shared by every replica mounting BETTERSAVE_CACHE_DIR
+@st.cache_resource
+def disk_cache():
+    return DiskCache(ttl=3600)
 
-    return energy_gen, energy_cons
+# Aggregates by year/month/ISO week, built once per dataset version across
+# all replicas so reruns (e.g. moving the year slider) only slice a few
+# small tables. Usually already in the disk cache: the server's start-up
+# warm-up puts them there (bettersave/startup.py).
+@st.cache_resource
+def load_rollup(dataset_version):
+    return rollup.cached(dataset_version, disk_cache())
+
+# Chart Figures (built once per year range and dataset version, shared by all sessions)
+def trends_figure(rollups, first_year, last_year):
+    consumption_by_year = rollups.table("energy_consumption", "year", first_year, last_year)
+    generation_by_year = rollups.table("energy_generation", "year", first_year, last_year)
+    # Joined on the year: after an append one dataset may cover years the other does not yet.
+    filtered_trends = pd.concat([
+        consumption_by_year["Total (grid load) [MWh] Calculated resolutions"].rename("Consumption"),
+        generation_by_year.sum(axis=1).rename("Generation"),
+    ], axis=1, join="inner").rename_axis("Year").reset_index()
+
+    filtered_trends_melted = filtered_trends.melt(id_vars=["Year"], var_name="Type", value_name="MWh")
+
+    fig = px.line(
+        filtered_trends_melted,
+        x="Year",
+        y="MWh",
+        color="Type",
+        title="Annual Energy Trends",
+        markers=True,
+        template="plotly_white"
+    )
+    fig.update_xaxes(type='category')
+    return fig
+
+def sources_figure(rollups):
+    generation_sources = rollups.table("energy_generation", "year").sum().sort_values(ascending=False)
+
+    return px.pie(
+        names=generation_sources.index.str.replace(" [MWh] Calculated resolutions", "", regex=False),
+        values=generation_sources.values,
+        title="Total Energy Generation by Source",
+        template="plotly_white"
+    )
+
+# Daily Series (one row per day; downsampled for plotting, see bettersave/downsample.py)
+@st.cache_resource
+def load_daily(dataset_version):
+    energy_gen, energy_cons = load_data()
+    daily = surplus.daily_surplus(energy_gen, energy_cons)
+    sources = energy_gen.set_index("Start date").loc[daily.index].drop(columns=storage.DATE_COLUMNS + storage.DERIVED_COLUMNS, errors="ignore")
+    sources.columns = sources.columns.str.replace(surplus.SUFFIX, "", regex=False)
+    return daily, sources
+
+DAILY_SERIES = [
+    ("Consumption", "load", "rgb(31,119,180)", "rgba(31,119,180,0.15)"),
+    ("Generation", "generation", "rgb(255,127,14)", "rgba(255,127,14,0.15)"),
+    ("Renewables", "renewables", "rgb(44,160,44)", "rgba(44,160,44,0.15)"),
+]
+
+def add_downsampled(fig, dates, values, name, line_color=None, band_color=None, max_points=downsample.MAX_POINTS):
+    # At most downsample.MAX_POINTS points of the series' shape (LTTB) and,
+    # when points were dropped, the daily min/max band behind it.
+    points = downsample.resolution(len(values), max_points)
+    if band_color and points < len(values):
+        x, low, high = downsample.envelope(dates, values, points // 2)
+        x = downsample.plot_dates(x)
+        fig.add_trace(go.Scatter(x=x, y=high, mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=x, y=low, mode="lines", line=dict(width=0), fill="tonexty", fillcolor=band_color,
+                                 name=f"{name} daily range", hoverinfo="skip"))
+    picked = downsample.lttb(dates, values, points)
+    fig.add_trace(go.Scatter(x=downsample.plot_dates(dates[picked]), y=values[picked], mode="lines", name=name, line=dict(color=line_color, width=1.5)))
+    return len(picked)
+
+def daily_figure(daily, start, end):
+    dates = daily.index.to_numpy()
+    lo, hi = downsample.window(dates, start, end)
+    fig = go.Figure()
+    for name, column, line_color, band_color in DAILY_SERIES:
+        add_downsampled(fig, dates[lo:hi], daily[column].to_numpy()[lo:hi], name, line_color, band_color)
+    fig.update_layout(title="Daily Consumption vs. Generation", xaxis_title="Date", yaxis_title="MWh per day", template="plotly_white")
+    return fig
+
+def daily_sources_figure(sources, start, end):
+    dates = sources.index.to_numpy()
+    lo, hi = downsample.window(dates, start, end)
+    fig = go.Figure()
+    for source in sources.columns:
+        # A dozen overlapping lines: a quarter of the points each keeps the payload near the chart above.
+        add_downsampled(fig, dates[lo:hi], sources[source].to_numpy()[lo:hi], source, max_points=downsample.MAX_POINTS // 4)
+    fig.update_layout(title="Daily Generation by Source", xaxis_title="Date", yaxis_title="MWh per day", template="plotly_white")
+    return fig
 
-energy_generation, energy_consumption = load_data()
+def year_window(daily, first_year, last_year):
+    # Dates of the daily data within the years first_year..last_year.
+    first_day, last_day = daily.index[0].date(), daily.index[-1].date()
+    return (max(first_day, pd.Timestamp(first_year, 1, 1).date()),
+            min(last_day, pd.Timestamp(last_year, 12, 31).date()))
 
-# Extract Key Metrics
-total_consumption = energy_consumption["Total (grid load) [MWh] Calculated resolutions"].sum()
-total_generation = energy_generation.iloc[:, 3:].apply(pd.to_numeric, errors='coerce').sum().sum()  # Sum of all energy sources
+# Quarter-hour Load (year/month-partitioned Parquet; only the selected years'
+# partitions and these columns are read, see bettersave/partitions.py)
+QUARTER_HOUR_COLUMNS = ("Start date", "Total (grid load) [MWh] Calculated resolutions", "Residual load [MWh] Calculated resolutions")
 
-# Group by Year and Sum Only Numeric Columns
-energy_consumption["Year"] = energy_consumption["Start date"].dt.year
-energy_generation["Year"] = energy_generation["Start date"].dt.year
-consumption_by_year = energy_consumption.groupby("Year").sum(numeric_only=True)
-generation_by_year = energy_generation.groupby("Year").sum(numeric_only=True)
+@st.cache_resource(ttl=3600, max_entries=2)
+def quarter_hour_partitions(written_ns):
+    return partitions.LazyPartitions("energy_consumption", "quarterhour")
 
-# Find the Year with Highest Consumption and Generation
-highest_consumption_year = consumption_by_year["Total (grid load) [MWh] Calculated resolutions"].idxmax()
-highest_generation_year = generation_by_year.sum(axis=1).idxmax()
+def quarter_hour_figure(first_year, last_year, written_ns):
+    table = quarter_hour_partitions(written_ns).load(first_year, last_year, QUARTER_HOUR_COLUMNS)
+    dates = table["Start date"].to_numpy()
+    fig = go.Figure()
+    for column, name, line_color, band_color in [
+        (QUARTER_HOUR_COLUMNS[1], "Grid load", "rgb(31,119,180)", "rgba(31,119,180,0.15)"),
+        (QUARTER_HOUR_COLUMNS[2], "Residual load", "rgb(214,39,40)", "rgba(214,39,40,0.15)"),
+    ]:
+        add_downsampled(fig, dates, table[column].to_numpy(zero_copy_only=False), name, line_color, band_color)
+    fig.update_layout(title=f"Quarter-hour Load {first_year}–{last_year}", xaxis_title="Date", yaxis_title="MWh per quarter hour", template="plotly_white")
+    return fig, table.num_rows
 
-efficiency_ratio = (total_generation / total_consumption) * 100
+# Running totals of the daily series, so KPIs over any date range cost two lookups
+@st.cache_resource
+def load_kpi_index(dataset_version):
+    daily, _ = load_daily(dataset_version)
+    return PrefixIndex(daily.index.to_numpy(), daily[["load", "generation", "renewables"]].to_numpy(), ["load", "generation", "renewables"])
+
+# Years both datasets cover: the only ones the year slider offers
+def shared_years(rollups):
+    return [int(year) for year in rollups.years("energy_consumption").intersection(rollups.years("energy_generation"))]
+
+# Every range the year slider allows is prebuilt in the background, so
+# moving the slider only looks a figure up.
+@st.cache_resource
+def load_figures(dataset_version):
+    rollups = load_rollup(dataset_version)
+    daily, sources = load_daily(dataset_version)
+    figures = FigureCache(dataset_version)
+    years = shared_years(rollups)
+    year_ranges = [(first, last) for i, first in enumerate(years) for last in years[i:]]
+    figures.prebuild("trends", year_ranges, lambda first, last: trends_figure(rollups, first, last))
+    figures.prebuild("sources", [()], lambda: sources_figure(rollups))
+    # The daily tabs open on the slider's years, so those windows are prebuilt too.
+    windows = [year_window(daily, first, last) for first, last in year_ranges]
+    figures.prebuild("daily", windows, lambda start, end: daily_figure(daily, start, end))
+    figures.prebuild("daily_sources", windows, lambda start, end: daily_sources_figure(sources, start, end))
+    return figures
+
+dataset_version = storage.dataset_version()
+with tracing.span("load_rollup"):
+    rollups = load_rollup(dataset_version)
+    consumption_by_year = rollups.table("energy_consumption", "year")
+    generation_by_year = rollups.table("energy_generation", "year")
+
+daily, sources = load_daily(dataset_version)
+first_day, last_day = daily.index[0].date(), daily.index[-1].date()
 
 # Sidebar Filters
 st.sidebar.header("Filters")
-year_selection = st.sidebar.slider("Select Year Range:", int(energy_consumption["Year"].min()), int(energy_consumption["Year"].max()), (2015, 2019))
+years = shared_years(rollups)
+year_selection = st.sidebar.slider("Select Year Range:", years[0], years[-1], (max(years[0], 2015), min(years[-1], 2019)))
+default_window = year_window(daily, *year_selection)
+kpi_window = st.sidebar.date_input("Key metrics date range:", value=(first_day, last_day), min_value=first_day, max_value=last_day, key="kpi_window")
+if len(kpi_window) < 2:
+    kpi_window = (first_day, last_day)
 
-# Filter Data
-filtered_energy_gen = energy_generation[(energy_generation["Year"] >= year_selection[0]) & (energy_generation["Year"] <= year_selection[1])]
-filtered_energy_cons = energy_consumption[(energy_consumption["Year"] >= year_selection[0]) & (energy_consumption["Year"] <= year_selection[1])]
+# Export the year-filtered datasets (written in streamed chunks to static/exports/,
+# downloaded from the static file server; see bettersave/exports.py)
+with st.sidebar.expander("Export data"):
+    export_format = st.selectbox("Format", list(exports.FORMATS), format_func=exports.label, key="export_format")
+    export_resolutions = ["day"] + [
+        resolution for resolution in partitions.RESOLUTIONS.values()
+        if resolution != "day" and any(partitions.available(name, resolution) for name in storage.DATASETS)
+    ]
+    export_resolution = st.selectbox("Resolution", export_resolutions, key="export_resolution")
+    export_params = (year_selection, export_format, export_resolution)
+    if st.session_state.get("dashboard_export_params") != export_params and st.button("Prepare files", key="prepare_export"):
+        with tracing.span("export"), st.spinner("Writing the export…"):
+            st.session_state.dashboard_exports = [
+                exports.export_dataset(name, *year_selection, export_format, export_resolution)
+                for name in storage.DATASETS
+                if export_resolution == "day" or partitions.available(name, export_resolution)
+            ]
+        st.session_state.dashboard_export_params = export_params
+    if st.session_state.get("dashboard_export_params") == export_params:
+        for item in st.session_state.dashboard_exports:
+            if exports.servable(item):
+                st.markdown(exports.link_html(item), unsafe_allow_html=True)
+            else:
+                st.error(exports.too_large_text(item))
+
+# Extract Key Metrics (over the picked days, from the running totals)
+with tracing.span("kpis"):
+    kpi_index = load_kpi_index(dataset_version)
+    kpi_totals = kpi_index.total(*kpi_window)
+    kpi_days = kpi_index.rows(*kpi_window)
+    total_consumption = kpi_totals["load"]
+    total_generation = kpi_totals["generation"]  # Sum of all energy sources
+
+    # Find the Year with Highest Consumption and Generation
+    highest_consumption_year = consumption_by_year["Total (grid load) [MWh] Calculated resolutions"].idxmax()
+    highest_generation_year = generation_by_year.sum(axis=1).idxmax()
+
+    efficiency_ratio = (total_generation / total_consumption) * 100 if total_consumption else 0.0
 
 # Custom CSS for Light Theme with Dark Text
 st.markdown("""
@@ -108,46 +290,81 @@ col3.markdown(f"""
     </div>
 """, unsafe_allow_html=True)
 
+if kpi_days:
+    st.caption(
+        f"{kpi_window[0]:%d %b %Y} – {kpi_window[1]:%d %b %Y} ({kpi_days:,} days): "
+        f"{total_consumption / kpi_days:,.0f} MWh consumed and {total_generation / kpi_days:,.0f} MWh generated per day on average, "
+        f"{kpi_totals['renewables'] / total_generation:.1%} of it renewable."
+    )
 
-tab1, tab2 = st.tabs(["Energy Consumption vs. Generation Over Time", "Total Energy Generation by Source"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    "Energy Consumption vs. Generation Over Time",
+    "Total Energy Generation by Source",
+    "Daily Consumption vs. Generation",
+    "Daily Generation by Source",
+    "Quarter-hour Load",
+])
 # Consumption vs. Generation Over Time
 with tab1:
     st.markdown("### Energy Consumption vs. Generation Over Time")
 
-    filtered_trends = pd.DataFrame({
-        "Year": consumption_by_year.loc[year_selection[0]:year_selection[1]].index,
-        "Consumption": consumption_by_year.loc[year_selection[0]:year_selection[1], "Total (grid load) [MWh] Calculated resolutions"].values,
-        "Generation": generation_by_year.loc[year_selection[0]:year_selection[1]].sum(axis=1).values
-    })
+    with tracing.span("trends:figure"):
+        fig = load_figures(dataset_version).get("trends", tuple(year_selection), lambda first, last: trends_figure(rollups, first, last))
 
-    filtered_trends_melted = filtered_trends.melt(id_vars=["Year"], var_name="Type", value_name="MWh")
-
-    fig = px.line(
-        filtered_trends_melted,
-        x="Year",
-        y="MWh",
-        color="Type",
-        title="Annual Energy Trends",
-        markers=True,
-        template="plotly_white"
-    )
-    fig.update_xaxes(type='category')
-
-    st.plotly_chart(fig, use_container_width=True)
+    with tracing.span("trends:plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
 
 with tab2:
     # Energy Source Contribution
     st.markdown("### Energy Source Contribution")
-    numeric_generation = energy_generation.drop(columns=["Start date", "End date", "Unnamed: 0", "Year"], errors='ignore').apply(pd.to_numeric, errors='coerce')
-    generation_sources = numeric_generation.sum().sort_values(ascending=False)
+    with tracing.span("sources:figure"):
+        fig_pie = load_figures(dataset_version).get("sources", (), lambda: sources_figure(rollups))
 
-    fig_pie = px.pie(
-        names=generation_sources.index.str.replace(" \[MWh\] Calculated resolutions", ""),
-        values=generation_sources.values,
-        title="Total Energy Generation by Source",
-        template="plotly_white"
-    )
+    with tracing.span("sources:plotly_chart"):
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+# Daily Curves (visible window picked below; at most downsample.MAX_POINTS points per series)
+with tab3:
+    st.markdown("### Daily Consumption vs. Generation")
+    window = st.date_input("Date window", value=default_window, min_value=first_day, max_value=last_day, key="daily_window")
+    if len(window) < 2:
+        window = default_window
+    with tracing.span("daily:figure"):
+        fig_daily = load_figures(dataset_version).get("daily", tuple(window), lambda start, end: daily_figure(daily, start, end))
+    with tracing.span("daily:plotly_chart"):
+        st.plotly_chart(fig_daily, use_container_width=True)
+    lo, hi = downsample.window(daily.index.to_numpy(), window[0], window[1])
+    st.caption(f"{hi - lo:,} days in the window; each series is drawn with at most {downsample.resolution(hi - lo):,} points, "
+               "the shaded band is the min/max of the days between them.")
+
+with tab4:
+    st.markdown("### Daily Generation by Source")
+    window = st.date_input("Date window", value=default_window, min_value=first_day, max_value=last_day, key="sources_window")
+    if len(window) < 2:
+        window = default_window
+    with tracing.span("daily_sources:figure"):
+        fig_sources = load_figures(dataset_version).get("daily_sources", tuple(window), lambda start, end: daily_sources_figure(sources, start, end))
+    with tracing.span("daily_sources:plotly_chart"):
+        st.plotly_chart(fig_sources, use_container_width=True)
+
+with tab5:
+    st.markdown("### Quarter-hour Load")
+    if partitions.available("energy_consumption", "quarterhour"):
+        # The partition directory's mtime changes when an export is re-ingested.
+        written_ns = partitions.partition_path("energy_consumption", "quarterhour").stat().st_mtime_ns
+        with tracing.span("quarter_hour:figure"):
+            fig_quarter_hour, quarter_hour_rows = load_figures(dataset_version).get(
+                "quarter_hour", (*year_selection, written_ns), quarter_hour_figure)
+        with tracing.span("quarter_hour:plotly_chart"):
+            st.plotly_chart(fig_quarter_hour, use_container_width=True)
+        st.caption(f"{quarter_hour_rows:,} quarter hours read for {year_selection[0]}–{year_selection[1]}, drawn with at most "
+                   f"{downsample.MAX_POINTS:,} points per series.")
+    else:
+        st.info("No quarter-hour data yet. Download SMARD's quarter-hour \"Actual consumption\" export and run "
+                "`python -m bettersave.partitions Actual_consumption_<dates>_Quarterhour.csv`.")
+
+st.markdown("---")
+st.markdown("Powered by BetterSave - Smarter Energy Decisions")
 
-    st.plotly_chart(fig_pie, use_container_width=True)
-    st.markdown("---")
-    st.markdown("Powered by BetterSave - Smarter Energy Decisions")
+# Performance Panel (opt-in per session; also logs the rerun as JSON when tracing)
+tracing.sidebar_panel(tracing.end(trace))
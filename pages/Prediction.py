@@ -1,42 +1,97 @@
 import streamlit as st
 import requests
-import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
+from bettersave import downsample, forecast_service, local_forecast, prediction_client, scenarios, storage, surplus, tracing
+from bettersave.horizon_loader import HorizonLoader
+
 # **🔹 Streamlit Page Config**
 st.set_page_config(page_title="BetterSave Energy Prediction", layout="wide")
 
-# **🔹 API URL**
-API_URL = "https://bettersave-296473938693.europe-west10.run.app/predict"
-
-# **🔹 Fetch Prediction Data**
-@st.cache_data(ttl=3600)
-def fetch_prediction(steps):
-    params = {"steps": steps}
-    response = requests.get(API_URL, params=params)
+# **🔹 Per-rerun Timing Spans** (BETTERSAVE_TRACE=1, or the sidebar's Performance panel)
+trace = tracing.begin("Prediction", st.session_state.get(tracing.PANEL_KEY, False))
 
-    if response.status_code == 200:
-        try:
-            data = response.json()
+# **🔹 Forecast Service** (prediction client, disk cache, forecast cache and store; one per server process)
+service = forecast_service.shared()
+service.warm_up()
 
-            if "confidence_interval" in data:
-                data["lower"] = data["confidence_interval"]["lower Residual load"]
-                data["upper"] = data["confidence_interval"]["upper Residual load"]
-                data.pop("confidence_interval", None)
+# **🔹 Local Fallback Model** (used when the API is slow or down)
+REMOTE_DEADLINE_S = 8
 
-            df = pd.DataFrame(data)
+@st.cache_resource
+def local_forecaster(dataset_version):
+    return local_forecast.fit_residual_load()
 
-            if "Date" not in df.columns:
-                df["Date"] = pd.date_range(start="2020-01-01", periods=len(df), freq="D")
+# **🔹 Surplus Model** (daily renewable surplus from the datasets, per dataset version)
+@st.cache_resource
+def load_surplus_model(dataset_version):
+    return surplus.SurplusModel.from_datasets()
 
-            return df
-        except Exception as e:
-            st.error(f"Error processing data: {e}")
-            return None
-    else:
-        st.error("Failed to fetch prediction data")
-        return None
+@st.cache_data(ttl=3600)
+def load_scenarios(dataset_version):
+    monthly = load_surplus_model(dataset_version).monthly.to_numpy()
+    return scenarios.ev_scenarios(monthly), scenarios.household_scenarios(monthly)
+
+def show_forecast(frame):
+    # Sessions keep only the key; the prepared frame lives in the shared store.
+    st.session_state.forecast_key, data = service.store.put(frame)
+    return data
+
+def local_prediction(steps):
+    with tracing.span("local_forecast"):
+        return local_forecaster(storage.dataset_version()).predict(steps, start=prediction_client.FORECAST_START)
+
+def load_forecast(loader, steps):
+    # The forecast to show for `steps` days, and the Future still loading
+    # it (None once settled). Never waits for the forecasting service: while
+    # it loads, the previous forecast stays on screen, and past the deadline
+    # the local model's forecast stands in until the remote one arrives.
+    #
+    # A finished fetch's spans (predict:http, :json, :parse) join this rerun's trace.
+    tracing.adopt(loader.take_trace())
+    # Forecasts of an older model than the API now reports are not reused.
+    model_version = service.current_model_version()
+    key = st.session_state.get("forecast_key")
+    current = service.store.get(key) if key else None
+    if current is not None and key[0] == steps and key[1] != "local" and model_version in (None, key[1]):
+        loader.cancel()
+        return current, None
+    if service.cache.horizon(model_version) >= steps:
+        # Sliced from the longest forecast fetched so far.
+        loader.cancel()
+        return show_forecast(service.cache.get(steps, model_version)), None
+
+    future = loader.request(steps)
+    if not future.done():
+        if loader.age() < REMOTE_DEADLINE_S:
+            return current, future
+        if current is None or key[0] != steps:
+            st.warning("The prediction service is slow to respond; showing the local model's forecast.")
+            return show_forecast(local_prediction(steps)), future
+        return current, future
+
+    try:
+        frame = future.result()
+    except requests.RequestException:
+        st.warning("Failed to fetch prediction data; showing the local model's forecast.")
+        frame = None
+    except (KeyError, TypeError, ValueError) as e:
+        st.warning(f"Error processing data: {e}. Showing the local model's forecast.")
+        frame = None
+    data = show_forecast(frame if frame is not None else local_prediction(steps))
+    # The frame now lives in the shared store; the session keeps only its key,
+    # not the finished Future. A failed fetch, or one of an older model than
+    # the API now reports, is tried again on the next rerun that needs it.
+    loader.cancel()
+    return data, None
+
+# **🔹 Wait for the Forecast** (polls without rerunning the page; reruns it once the forecast is in)
+POLL_S = 0.25
+
+@st.fragment(run_every=POLL_S)
+def await_forecast(future):
+    if future.done():
+        st.rerun()
 
 # **🔹 Custom CSS for Blinking Glow Text & Fixing Alignment**
 st.markdown("""
@@ -78,88 +133,109 @@ st.markdown("### Energy Consumption & Generation Trend (2020)")
 # **🔹 User Input: Select Prediction Range**
 number_of_days = st.slider("Select Prediction Range (Days)", 1, 365, 30)
 
-# **🔹 Fetch Data Only Once**
-if "data" not in st.session_state:
+# **🔹 Start Predicting** (after the first press, the forecast follows the slider)
+if "horizon_loader" not in st.session_state:
     if st.button("Predict"):
-        st.session_state.data = fetch_prediction(number_of_days)
+        st.session_state.horizon_loader = HorizonLoader(service.forecast, service.executor)
+
+# **🔹 Load the Selected Horizon** (debounced, in the background; stale requests are cancelled)
+data = None
+if "horizon_loader" in st.session_state:
+    with tracing.span("forecast:load"):
+        data, loading = load_forecast(st.session_state.horizon_loader, number_of_days)
+    if loading is not None:
+        if data is None:
+            st.info(f"Fetching the {number_of_days}-day forecast…")
+        else:
+            shown_days, shown_model = st.session_state.forecast_key
+            shown = "the local model's" if shown_model == "local" else "the previous"
+            st.caption(f"Loading the {number_of_days}-day forecast; showing {shown} {shown_days}-day forecast meanwhile.")
+        await_forecast(loading)
 
 # **🔹 Display Prediction Data**
-if "data" in st.session_state:
-    data = st.session_state.data
-
-    data["Date"] = pd.to_datetime(data["Date"], errors='coerce')
-    data = data.dropna(subset=["Date"])
-    data["Year"] = data["Date"].dt.year
-    data["Month"] = data["Date"].dt.strftime('%b')
-
-    historical_data = data[data["Year"] < 2020]
-    predicted_data = data[data["Year"] >= 2020]
-
-    fig = go.Figure()
-
-    # **🔹 Historical Data (Blue Line)**
-    if not historical_data.empty:
-        fig.add_trace(go.Scatter(
-            x=historical_data["Year"],
-            y=historical_data["forecast"],
-            mode="lines+markers",
-            name="Historical Forecast",
-            line=dict(color="blue", width=3)
-        ))
-
-    # **🔹 Predicted Data (Green Dashed Line)**
-    if not predicted_data.empty:
-        fig.add_trace(go.Scatter(
-            x=predicted_data["Date"],
-            y=predicted_data["forecast"],
-            mode="lines+markers",
-            name="Predicted Forecast",
-            line=dict(color="green", dash="dash", width=3)
-        ))
-
-        # **🔹 Confidence Interval (Shaded Area)**
-        fig.add_trace(go.Scatter(
-            x=predicted_data["Date"].tolist() + predicted_data["Date"].tolist()[::-1],
-            y=predicted_data["upper"].tolist() + predicted_data["lower"].tolist()[::-1],
-            fill='toself',
-            fillcolor='rgba(0,255,0,0.2)',
-            line=dict(color='rgba(255,255,255,0)'),
-            name="Confidence Interval"
-        ))
-
-    # **🔹 Custom X-Axis Formatting**
-    fig.update_layout(
-        title="Energy Trends: Historical vs. Predicted",
-        xaxis_title="Year / Month",
-        yaxis_title="MWh",
-        template="plotly_white",
-        xaxis=dict(
-            tickmode='array',
-            tickvals=data["Date"],
-            ticktext=[f"{m} {y}" if y == 2020 else str(y) for y, m in zip(data["Year"], data["Month"])]
+if data is not None:
+    # Only needed once there is a forecast to show, so the page's first run
+    # does not wait for them (bettersave/startup.py)
+    import plotly.graph_objects as go
+
+    from bettersave import exports
+
+    with tracing.span("load_surplus_model"):
+        surplus_model = load_surplus_model(storage.dataset_version())
+
+    with tracing.span("forecast:prepare"):
+        historical_data = data[data["Year"] < 2020]
+        predicted_data = data[data["Year"] >= 2020]
+
+    with tracing.span("forecast:figure"):
+        fig = go.Figure()
+
+        # **🔹 Historical Data (Blue Line)**
+        if not historical_data.empty:
+            fig.add_trace(go.Scatter(
+                x=historical_data["Year"],
+                y=historical_data["forecast"],
+                mode="lines+markers",
+                name="Historical Forecast",
+                line=dict(color="blue", width=3)
+            ))
+
+        # **🔹 Predicted Data (Green Dashed Line)**
+        if not predicted_data.empty:
+            fig.add_trace(go.Scatter(
+                x=predicted_data["Date"],
+                y=predicted_data["forecast"],
+                mode="lines+markers",
+                name="Predicted Forecast",
+                line=dict(color="green", dash="dash", width=3)
+            ))
+
+            # **🔹 Confidence Interval (Shaded Area)**
+            fig.add_trace(go.Scatter(
+                x=predicted_data["Date"].tolist() + predicted_data["Date"].tolist()[::-1],
+                y=predicted_data["upper"].tolist() + predicted_data["lower"].tolist()[::-1],
+                fill='toself',
+                fillcolor='rgba(0,255,0,0.2)',
+                line=dict(color='rgba(255,255,255,0)'),
+                name="Confidence Interval"
+            ))
+
+        # **🔹 Custom X-Axis Formatting** (at most 24 labels, not one per forecast day)
+        tick_rows = data.iloc[downsample.ticks(len(data))]
+        fig.update_layout(
+            title="Energy Trends: Historical vs. Predicted",
+            xaxis_title="Year / Month",
+            yaxis_title="MWh",
+            template="plotly_white",
+            xaxis=dict(
+                tickmode='array',
+                tickvals=tick_rows["Date"],
+                ticktext=[f"{m} {y}" if y == 2020 else str(y) for y, m in zip(tick_rows["Year"], tick_rows["Month"])]
+            )
         )
-    )
 
     col1, col2 = st.columns((3,1))
 
-    with col1:
+    with col1, tracing.span("forecast:plotly_chart"):
         st.plotly_chart(fig, use_container_width=True)
 
     # **🔹 Audi EV Charging Calculation**
     with col2:
         st.subheader("🔋 How Many EVs Can Be Charged?")
 
-        total_surplus_mwh = 334.47  # MWh for 1 month
+        forecast_days = len(predicted_data)
+        with tracing.span("surplus:forecast_total"):
+            total_surplus_mwh = surplus_model.forecast_total(predicted_data)  # Expected surplus over the forecast horizon
         battery_capacity_kwh = 95  # kWh for Audi e-tron 55 quattro
         total_charges = int((total_surplus_mwh * 1000) / battery_capacity_kwh)  # Convert MWh to kWh
 
         st.markdown(f"""
             <p class='blinking-glow-text'>
-            With <b>{total_surplus_mwh:.2f} MWh</b> of surplus energy in just one month, we could fully charge approximately:
+            With <b>{total_surplus_mwh:,.0f} MWh</b> of surplus energy expected over the next {forecast_days} day(s), we could fully charge approximately:
             </p>
         """, unsafe_allow_html=True)
 
-        st.markdown(f"<h1 style='text-align: center; color: #000000; font-size: 42px;'>{total_charges}</h1>", unsafe_allow_html=True)
+        st.markdown(f"<h1 style='text-align: center; color: #000000; font-size: 42px;'>{total_charges:,}</h1>", unsafe_allow_html=True)
 
         st.markdown("<p class='center-text'>Audi e-tron 55 quattro EVs! 🚗⚡</p>", unsafe_allow_html=True)
 
@@ -171,19 +247,70 @@ if "data" in st.session_state:
     months = st.slider("Select Months of Surplus Energy", 1, 12, 1, key="surplus_months")
 
     avg_home_annual_consumption_mwh = 3.5  # Average German household yearly consumption in MWh
-    total_energy_mwh = total_surplus_mwh * months
+    german_households = 41_000_000
+    total_energy_mwh = surplus_model.months_ahead(months, prediction_client.FORECAST_START)  # Typical surplus of those calendar months
     homes_powered = int(total_energy_mwh / avg_home_annual_consumption_mwh)
 
     st.markdown(f"""
         <p class='blinking-glow-text'>
-        With <b>{months} month(s)</b> of surplus energy, we could fully power:
+        With <b>{months} month(s)</b> of surplus energy ({total_energy_mwh:,.0f} MWh), we could fully power:
         </p>
     """, unsafe_allow_html=True)
 
-    st.markdown(f"<h1 style='text-align: center; color: #000000; font-size: 42px;'>{homes_powered} Homes</h1>", unsafe_allow_html=True)
+    st.markdown(f"<h1 style='text-align: center; color: #000000; font-size: 42px;'>{homes_powered:,} Homes</h1>", unsafe_allow_html=True)
+
+    st.progress(min(1.0, homes_powered / german_households), text="Share of German households")
+
+    # **🔹 Scenario Explorer (vehicle models, charging losses, household profiles)**
+    st.markdown("---")
+    st.markdown("<h2 style='text-align: center;'>🔬 Scenario Explorer</h2>", unsafe_allow_html=True)
+    st.markdown("Each scenario is evaluated against every month of the surplus history; bars show the median month, whiskers the 10th–90th percentile.")
+
+    with tracing.span("load_scenarios"):
+        ev_table, household_table = load_scenarios(storage.dataset_version())
+
+    col1, col2 = st.columns(2)
+    charging_loss = col1.select_slider("Charging loss", options=scenarios.CHARGING_LOSSES, value=0.10, format_func=lambda v: f"{v:.0%}")
+    charge_depth = col2.radio("Charge per vehicle", scenarios.CHARGE_DEPTHS, format_func=lambda v: "Empty to full" if v == 1.0 else f"{v:.0%} of battery", horizontal=True)
+
+    with tracing.span("scenarios:figures"):
+        ev_view = ev_table[(ev_table["charging_loss"] == charging_loss) & (ev_table["charge_depth"] == charge_depth)].sort_values("p50")
+        fig_ev = go.Figure(go.Bar(
+            x=ev_view["p50"],
+            y=ev_view["model"],
+            orientation="h",
+            error_x=dict(type="data", symmetric=False, array=ev_view["p90"] - ev_view["p50"], arrayminus=ev_view["p50"] - ev_view["p10"]),
+            marker_color="green",
+        ))
+        fig_ev.update_layout(title="EV Charges per Month of Surplus", xaxis_title="Charges", template="plotly_white")
 
-    st.progress(min(1.0, homes_powered / 5000))
+        fig_homes = go.Figure()
+        for profile, rows in household_table.groupby("profile", sort=False):
+            fig_homes.add_trace(go.Scatter(x=rows["months"], y=rows["p50"], mode="lines+markers", name=profile))
+        fig_homes.update_layout(title="Homes Powered for a Year by N Months of Surplus (median)", xaxis_title="Months of surplus", yaxis_title="Homes", template="plotly_white")
+
+    with tracing.span("scenarios:plotly_chart"):
+        st.plotly_chart(fig_ev, use_container_width=True)
+        st.plotly_chart(fig_homes, use_container_width=True)
 
     # **🔹 Forecast Table**
     st.markdown("### 📊 Forecast Data Table")
     st.dataframe(data[["Date", "forecast", "lower", "upper"]].head(30), use_container_width=True)
+
+    # **🔹 Export the Full Forecast** (every row, written in streamed chunks to static/exports/ on request)
+    col1, col2 = st.columns((1, 3))
+    forecast_format = col1.selectbox("Export format", list(exports.FORMATS), format_func=exports.label, key="forecast_export_format")
+    export_params = (st.session_state.forecast_key, forecast_format)
+    if st.session_state.get("forecast_export_params") != export_params and col2.button("Prepare file", key="prepare_forecast_export"):
+        with tracing.span("forecast:export"), st.spinner("Writing the export…"):
+            st.session_state.forecast_export = exports.export_frame(f"forecast_{len(data)}d", data[["Date", "forecast", "lower", "upper"]], forecast_format)
+        st.session_state.forecast_export_params = export_params
+    if st.session_state.get("forecast_export_params") == export_params:
+        forecast_export = st.session_state.forecast_export
+        if exports.servable(forecast_export):
+            col2.markdown(exports.link_html(forecast_export, f"All {len(data)} forecast days"), unsafe_allow_html=True)
+        else:
+            col2.error(exports.too_large_text(forecast_export))
+
+# **🔹 Performance Panel** (opt-in per session; also logs the rerun as JSON when tracing)
+tracing.sidebar_panel(tracing.end(trace))
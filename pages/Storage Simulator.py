@@ -0,0 +1,132 @@
+import time
+
+import streamlit as st
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from bettersave import dispatch, storage, tracing
+
+# **🔹 Streamlit Page Config**
+st.set_page_config(page_title="BetterSave Storage Simulator", layout="wide")
+
+# **🔹 Per-rerun Timing Spans** (BETTERSAVE_TRACE=1, or the sidebar's Performance panel)
+trace = tracing.begin("Storage Simulator", st.session_state.get(tracing.PANEL_KEY, False))
+
+# **🔹 Daily Surplus / Deficit History (once per dataset version)**
+@st.cache_resource
+def load_balance(dataset_version):
+    return dispatch.daily_balance()
+
+# **🔹 Simulate a Grid of Store Configurations (one batched pass)**
+@st.cache_data(ttl=3600)
+def run_grid(dataset_version, capacities, powers, efficiencies):
+    dates, surplus_mwh, deficit_mwh = load_balance(dataset_version)
+    configs = dispatch.config_grid(capacities, powers, efficiencies)
+    start = time.perf_counter()
+    results, _ = dispatch.simulate(surplus_mwh, deficit_mwh, configs)
+    return results, time.perf_counter() - start
+
+@st.cache_data(ttl=3600)
+def run_single(dataset_version, capacity, power, efficiency):
+    dates, surplus_mwh, deficit_mwh = load_balance(dataset_version)
+    configs = dispatch.config_grid([capacity], [power], [efficiency])
+    results, soc = dispatch.simulate(surplus_mwh, deficit_mwh, configs, record_soc=True)
+    return results.iloc[0], dates, soc[:, 0]
+
+dataset_version = storage.dataset_version()
+with tracing.span("load_balance"):
+    dates, surplus_mwh, deficit_mwh = load_balance(dataset_version)
+
+# **🔹 UI Setup**
+st.markdown("<h1 style='text-align: center;'>BetterSave Storage Simulator</h1>", unsafe_allow_html=True)
+st.markdown(
+    f"What happens with an X MWh store? Every configuration below charges from the daily renewable surplus "
+    f"and discharges into the daily deficit over {len(dates):,} days "
+    f"({dates[0]:%b %Y} – {dates[-1]:%b %Y})."
+)
+
+# **🔹 Sidebar: Configuration Grid**
+st.sidebar.header("Store Configurations")
+capacity_range = st.sidebar.slider("Capacity (MWh)", 1_000, 500_000, (10_000, 300_000), step=1_000)
+capacity_steps = st.sidebar.slider("Capacity steps", 5, 80, 40)
+power_range = st.sidebar.slider("Charge / discharge power (MW)", 100, 20_000, (500, 10_000), step=100)
+power_steps = st.sidebar.slider("Power steps", 5, 80, 40)
+efficiencies = st.sidebar.multiselect("Round-trip efficiency", [0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95], default=[0.75, 0.85, 0.95])
+
+if not efficiencies:
+    st.info("Select at least one round-trip efficiency.")
+    tracing.sidebar_panel(tracing.end(trace))
+    st.stop()
+
+# Rounding a narrow range (or one with both ends equal) repeats values, which
+# would give the coverage map duplicate rows and columns.
+capacities = tuple(np.unique(np.linspace(*capacity_range, capacity_steps).round()))
+powers = tuple(np.unique(np.linspace(*power_range, power_steps).round()))
+with tracing.span("run_grid"):
+    results, elapsed = run_grid(dataset_version, capacities, powers, tuple(sorted(efficiencies)))
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Configurations simulated", f"{len(results):,}")
+col2.metric("Simulation time", f"{elapsed:.2f} s")
+col3.metric("Best share of deficit covered", f"{results['deficit_covered'].max():.1%}")
+
+# **🔹 Deficit Coverage Map**
+efficiency = st.select_slider("Show efficiency", options=sorted(efficiencies), value=sorted(efficiencies)[-1])
+with tracing.span("coverage:figure"):
+    view = results[results["efficiency"] == efficiency]
+    coverage = view.pivot(index="charge_mw", columns="capacity_mwh", values="deficit_covered")
+
+    fig = go.Figure(go.Heatmap(
+        x=coverage.columns,
+        y=coverage.index,
+        z=coverage.values * 100,
+        colorscale="Viridis",
+        colorbar=dict(title="% deficit covered"),
+        hovertemplate="%{x:,.0f} MWh / %{y:,.0f} MW<br>%{z:.1f}% of deficit covered<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f"Share of Daily Deficit Covered (round-trip efficiency {efficiency:.0%})",
+        xaxis_title="Capacity (MWh)",
+        yaxis_title="Power (MW)",
+        template="plotly_white",
+    )
+with tracing.span("coverage:plotly_chart"):
+    st.plotly_chart(fig, use_container_width=True)
+
+# **🔹 Single Store in Detail**
+st.markdown("### 🔋 One Store Over Time")
+col1, col2 = st.columns(2)
+
+def pick(column, label, options):
+    # A one-point grid has nothing to pick from.
+    if len(options) == 1:
+        column.markdown(f"**{label}:** {options[0]:,.0f}")
+        return options[0]
+    return column.select_slider(label, options=options, value=options[len(options) // 2], format_func=lambda v: f"{v:,.0f}")
+
+capacity = pick(col1, "Capacity (MWh)", capacities)
+power = pick(col2, "Power (MW)", powers)
+with tracing.span("run_single"):
+    summary, soc_dates, soc = run_single(dataset_version, capacity, power, efficiency)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Energy stored", f"{summary['charged_mwh']:,.0f} MWh")
+col2.metric("Energy delivered", f"{summary['delivered_mwh']:,.0f} MWh")
+col3.metric("Deficit covered", f"{summary['deficit_covered']:.1%}")
+col4.metric("Full cycles", f"{summary['full_cycles']:,.0f}")
+
+with tracing.span("soc:figure"):
+    fig_soc = px.area(x=soc_dates, y=soc, labels={"x": "Date", "y": "Stored energy (MWh)"},
+                      title="State of Charge", template="plotly_white")
+with tracing.span("soc:plotly_chart"):
+    st.plotly_chart(fig_soc, use_container_width=True)
+
+# **🔹 Best Configurations**
+st.markdown("### 📊 Top Configurations by Deficit Covered")
+st.dataframe(results.nlargest(10, "deficit_covered"), use_container_width=True)
+
+st.caption("Daily resolution: charging and discharging within the same day are netted out.")
+
+# **🔹 Performance Panel** (opt-in per session; also logs the rerun as JSON when tracing)
+tracing.sidebar_panel(tracing.end(trace))
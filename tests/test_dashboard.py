@@ -0,0 +1,74 @@
+# The Dashboard after `python -m bettersave.ingest --append` (as in
+# bettersave/ingest.py): appending one dataset's export leaves the other a
+# few days behind, and the page must still render every range it offers.
+#
+#     python -m unittest discover tests
+#
+# Each test works on a copy of the code and the datasets in a temporary
+# directory, so the append never touches data/.
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RAW_CONSUMPTION = "Actual_consumption_201501010000_202001020000_Day.csv"
+
+# Renders the Dashboard at every year range the slider allows; prints the
+# slider's bounds, exits 1 on the first exception.
+RENDER = """
+import sys
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file("pages/Dashboard.py", default_timeout=120).run()
+slider = at.sidebar.slider[0]
+first, last = int(slider.min), int(slider.max)
+print(first, last)
+for low in range(first, last + 1):
+    for high in range(low, last + 1):
+        at.sidebar.slider[0].set_value((low, high)).run()
+        if at.exception:
+            sys.exit(f"{low}-{high}: {at.exception[0].value}")
+"""
+
+
+class DashboardAfterAppendTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="bettersave-test-"))
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        for directory in ("bettersave", "pages"):
+            shutil.copytree(ROOT / directory, self.root / directory, ignore=shutil.ignore_patterns("__pycache__"))
+        (self.root / "data").mkdir()
+        for path in (ROOT / "data").glob("*"):
+            if path.is_file():
+                shutil.copy2(path, self.root / "data")
+        for path in ROOT.glob("*.csv"):
+            shutil.copy2(path, self.root)
+        self.env = {
+            **os.environ,
+            "PYTHONPATH": str(self.root),
+            "BETTERSAVE_CACHE_DIR": str(self.root / "cache"),
+            "BETTERSAVE_WARM_UP": "0",
+        }
+
+    def run_in_copy(self, *args):
+        return subprocess.run([sys.executable, *args], cwd=self.root, env=self.env,
+                              capture_output=True, text=True, timeout=600)
+
+    def test_every_year_range_renders_after_append(self):
+        appended = self.run_in_copy("-m", "bettersave.ingest", "--append", RAW_CONSUMPTION)
+        self.assertEqual(appended.returncode, 0, appended.stderr)
+        self.assertRegex(appended.stdout, r"appended [1-9]")
+
+        rendered = self.run_in_copy("-c", RENDER)
+        self.assertEqual(rendered.returncode, 0, rendered.stderr[-2000:])
+        first, last = map(int, rendered.stdout.split())
+        # Consumption now reaches into 2020, generation does not.
+        self.assertEqual((first, last), (2015, 2019))
+
+
+if __name__ == "__main__":
+    unittest.main()